@@ -0,0 +1,13 @@
+# The Celery app is loaded on first access (celery -A alx_travel_app, or
+# listings.tasks importing it) rather than on every Django startup, so web
+# processes and management commands don't pay for importing celery.
+
+
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ('celery_app',)
@@ -0,0 +1,31 @@
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
+
+app = Celery('alx_travel_app')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    'archive-old-bookings': {
+        'task': 'listings.tasks.archive_old_bookings',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'refresh-host-stats': {
+        'task': 'listings.tasks.refresh_host_stats',
+        'schedule': crontab(minute='*/15'),
+    },
+    'expire-booking-holds': {
+        'task': 'listings.tasks.expire_booking_holds',
+        'schedule': crontab(),
+    },
+    'prune-booking-tombstones': {
+        'task': 'listings.tasks.prune_booking_tombstones',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
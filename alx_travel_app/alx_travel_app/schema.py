@@ -0,0 +1,127 @@
+"""
+OpenAPI schema and docs views.
+
+Generating the schema introspects every view and serializer, so it is done
+once per deploy: `manage.py generate_api_schema` writes openapi.json and
+openapi.yaml to API_SCHEMA_DIR, and a process that finds no file generates
+the schema on first use instead. Either way the document is kept in memory
+and served with an ETag, so clients that already have it get a 304. The
+Swagger UI and ReDoc pages only point the browser at that document.
+
+drf_yasg is only imported when the schema or a docs page is first needed.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition, require_safe
+
+# Formats served at /swagger.<format>/ and written by generate_api_schema
+FORMATS = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+_schema_view = None
+_documents = {}
+
+
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="ALX Travel API",
+        default_version="v1",
+        description="API documentation for the ALX Travel App",
+        terms_of_service="https://www.example.com/terms/",
+        contact=openapi.Contact(email="support@example.com"),
+        license=openapi.License(name="MIT License"),
+    )
+
+
+def get_schema_view():
+    """Build the drf_yasg schema view, importing drf_yasg only when docs are used"""
+    global _schema_view
+    if _schema_view is None:
+        from rest_framework import permissions
+        from drf_yasg.views import get_schema_view as yasg_schema_view
+
+        _schema_view = yasg_schema_view(
+            api_info(),
+            public=True,
+            permission_classes=(permissions.AllowAny,),
+        )
+    return _schema_view
+
+
+def docs_view(renderer):
+    """
+    Swagger UI or ReDoc page. The page loads the document from SPEC_URL in
+    the browser, so it is rendered from the API info alone and never
+    generates the schema.
+    """
+    @require_safe
+    def view(request):
+        from drf_yasg import openapi
+        from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+
+        ui = {'swagger': SwaggerUIRenderer, 'redoc': ReDocRenderer}[renderer]()
+        # Title and version for the page; the paths come from SPEC_URL
+        shell = openapi.Swagger(info=api_info(), _prefix='/', paths=openapi.Paths(paths={}))
+        content = ui.render(shell, renderer_context={'request': request})
+        return HttpResponse(content, content_type='text/html; charset=utf-8')
+    return view
+
+
+def generate_schema(fmt):
+    """Render the full public schema as bytes in the given format"""
+    from drf_yasg import codecs
+
+    generator = get_schema_view().generator_class(api_info())
+    # Without a request the schema has no host, so clients use the one they fetched it from
+    schema = generator.get_schema(request=None, public=True)
+    if fmt == 'yaml':
+        codec = codecs.OpenAPICodecYaml(validators=[])
+    else:
+        codec = codecs.OpenAPICodecJson(validators=[], pretty=True)
+    return codec.encode(schema)
+
+
+def schema_path(fmt, directory=None):
+    return os.path.join(directory or settings.API_SCHEMA_DIR, f'openapi.{fmt}')
+
+
+def get_schema_document(fmt):
+    """(content, etag) for fmt, read from the deploy artifact or generated once"""
+    if fmt not in _documents:
+        path = schema_path(fmt)
+        if os.path.exists(path):
+            with open(path, 'rb') as fh:
+                content = fh.read()
+        else:
+            content = generate_schema(fmt)
+        _documents[fmt] = content, hashlib.sha256(content).hexdigest()
+    return _documents[fmt]
+
+
+def clear_schema_cache():
+    _documents.clear()
+
+
+def _schema_etag(request, format):
+    if format not in FORMATS:
+        return None
+    return get_schema_document(format)[1]
+
+
+@require_safe
+@condition(etag_func=_schema_etag)
+def schema_document_view(request, format):
+    if format not in FORMATS:
+        raise Http404(f'Unknown schema format {format!r}')
+    content, _ = get_schema_document(format)
+    response = HttpResponse(content, content_type=FORMATS[format])
+    # The document only changes on deploy; revalidating with the ETag is cheap
+    response['Cache-Control'] = 'public, no-cache'
+    return response
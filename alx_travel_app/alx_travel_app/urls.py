@@ -14,31 +14,25 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="ALX Travel API",
-        default_version="v1",
-        description="API documentation for the ALX Travel App",
-        terms_of_service="https://www.example.com/terms/",
-        contact=openapi.Contact(email="support@example.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from .schema import docs_view, schema_document_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    # Swagger documentation
-    path('swagger.<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+]
+
+if settings.ENABLE_API_DOCS:
+    urlpatterns += [
+        # Swagger documentation, served from the cached schema document
+        path('swagger.<format>/', schema_document_view, name='schema-json'),
+        path('swagger/', docs_view('swagger'), name='schema-swagger-ui'),
+        path('redoc/', docs_view('redoc'), name='schema-redoc'),
+    ]
+
+urlpatterns += [
     # API urls
     path('api/', include('listings.urls'), name='listing-api'),
-]
\ No newline at end of file
+]
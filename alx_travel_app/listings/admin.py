@@ -1,3 +1,77 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
+from .models import Property, Booking, Review, Payment
+
+# List pages are built for large tables: related rows are joined in the
+# list query (or read from the booking snapshot), filters use indexed
+# columns and the unfiltered total count is skipped.
+
+
+@admin.register(Property)
+class PropertyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'location', 'pricepernight', 'host', 'created_at')
+    list_select_related = ('host',)
+    search_fields = ('name', 'location')
+    autocomplete_fields = ('host',)
+    show_full_result_count = False
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    # Snapshot columns instead of property/user, so the list needs no joins
+    list_display = (
+        'booking_id', 'property_name', 'guest_username', 'start_date', 'end_date',
+        'total_price', 'status', 'created_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('=booking_id',)
+    autocomplete_fields = ('property', 'user')
+    readonly_fields = (
+        'property_name', 'property_location', 'pricepernight', 'guest_username',
+        'created_at', 'updated_at',
+    )
+    show_full_result_count = False
+    actions = ('confirm_bookings', 'cancel_bookings')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Delta sync clients scoped to the old property or guest would never
+        # learn the booking left, so neither can change once it exists
+        if obj is not None:
+            return ('property', 'user') + self.readonly_fields
+        return self.readonly_fields
+
+    def _set_status(self, request, queryset, from_statuses, status):
+        # One UPDATE; bulk updates skip auto_now, and listings.stats reads updated_at
+        updated = queryset.filter(status__in=from_statuses).update(
+            status=status, updated_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} booking(s) marked as {status}.', messages.SUCCESS)
+
+    @admin.action(description='Confirm selected pending bookings')
+    def confirm_bookings(self, request, queryset):
+        # Expired holds may have lost their dates to another booking
+        self._set_status(request, queryset.blocking(), ['pending'], 'confirmed')
+
+    @admin.action(description='Cancel selected bookings')
+    def cancel_bookings(self, request, queryset):
+        self._set_status(request, queryset, ['pending', 'confirmed'], 'canceled')
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ('property', 'user', 'rating', 'created_at')
+    list_select_related = ('property', 'user')
+    autocomplete_fields = ('property', 'user')
+    show_full_result_count = False
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'booking', 'amount', 'payment_status', 'transaction_id', 'created_at')
+    list_select_related = ('booking',)
+    list_filter = ('payment_status',)
+    search_fields = ('=transaction_id',)
+    raw_id_fields = ('booking',)
+    show_full_result_count = False
+    ordering = ('-id',)
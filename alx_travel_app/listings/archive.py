@@ -0,0 +1,133 @@
+# listings/archive.py
+"""
+Moves finished bookings and their payments to the archive tables.
+
+Each batch is copied and deleted in its own transaction, so a run can be
+stopped at any point and the next run carries on where it left off.
+"""
+from django.db import connection, transaction
+
+from .models import Booking, BookingTombstone, Payment, ArchivedBooking, ArchivedPayment
+from .stats import stale_tracking_paused
+from .sync import tombstones_paused
+
+ARCHIVABLE_STATUSES = ['confirmed', 'canceled']
+
+_partitioned = None
+
+
+def archivable_bookings(cutoff):
+    """Confirmed or canceled bookings that ended before cutoff"""
+    return Booking.objects.filter(status__in=ARCHIVABLE_STATUSES, end_date__lt=cutoff)
+
+
+def archive_is_partitioned():
+    """Whether the archive table was converted with partition_archive_table()"""
+    global _partitioned
+    if _partitioned is None:
+        _partitioned = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+                    [ArchivedBooking._meta.db_table],
+                )
+                _partitioned = cursor.fetchone() is not None
+    return _partitioned
+
+
+def ensure_archive_partitions(years):
+    """Create the yearly start_date partitions the next batch will need"""
+    table = ArchivedBooking._meta.db_table
+    with connection.cursor() as cursor:
+        for year in sorted(years):
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}_y{year}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+
+
+def partition_archive_table():
+    """
+    Recreate the (empty) archive table on PostgreSQL as range-partitioned
+    by start_date, one partition per year. Booking itself is not
+    partitioned: PostgreSQL requires the partition key in every unique
+    constraint, which would break the Payment -> Booking foreign key.
+    """
+    global _partitioned
+    if connection.vendor != 'postgresql':
+        raise ValueError('Partitioning is only supported on PostgreSQL')
+    if archive_is_partitioned():
+        return False
+    if ArchivedBooking.objects.exists():
+        raise ValueError('The archive table must be empty to be partitioned')
+
+    table = ArchivedBooking._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_old"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{table}_old" INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE (start_date)'
+        )
+        # Unique constraints on a partitioned table must include the partition key
+        cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (booking_id, start_date)')
+        cursor.execute(f'CREATE INDEX "{table}_property_id_idx" ON "{table}" (property_id)')
+        cursor.execute(f'CREATE INDEX "{table}_user_id_idx" ON "{table}" (user_id)')
+        cursor.execute(f'DROP TABLE "{table}_old"')
+    _partitioned = True
+    return True
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """Archive up to batch_size bookings, returning (bookings, payments) moved"""
+    with transaction.atomic():
+        bookings = list(
+            archivable_bookings(cutoff)
+            .order_by('end_date', 'booking_id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not bookings:
+            return 0, 0
+        booking_ids = [booking.booking_id for booking in bookings]
+        payments = list(Payment.objects.filter(booking_id__in=booking_ids))
+
+        if archive_is_partitioned():
+            ensure_archive_partitions({booking.start_date.year for booking in bookings})
+
+        # ignore_conflicts keeps a re-run safe if rows were copied by hand
+        ArchivedBooking.objects.bulk_create(
+            [ArchivedBooking.from_booking(booking) for booking in bookings],
+            ignore_conflicts=True,
+        )
+        ArchivedPayment.objects.bulk_create(
+            [ArchivedPayment.from_payment(payment) for payment in payments],
+            ignore_conflicts=True,
+        )
+        Payment.objects.filter(booking_id__in=booking_ids).delete()
+        # Archived bookings leave the booking lists, so delta sync reports them deleted
+        BookingTombstone.objects.bulk_create(
+            [BookingTombstone.from_booking(booking) for booking in bookings],
+            ignore_conflicts=True,
+        )
+        # Host stats read the archive too, so these months stay correct
+        with stale_tracking_paused(), tombstones_paused():
+            Booking.objects.filter(booking_id__in=booking_ids).delete()
+    return len(bookings), len(payments)
+
+
+def archive_bookings(cutoff, batch_size=1000, max_batches=None, on_batch=None):
+    """
+    Archive every eligible booking in batches. max_batches bounds a single
+    run; whatever is left is picked up by the next one.
+    """
+    total_bookings = total_payments = batches = 0
+    while max_batches is None or batches < max_batches:
+        bookings, payments = archive_batch(cutoff, batch_size)
+        if not bookings:
+            break
+        batches += 1
+        total_bookings += bookings
+        total_payments += payments
+        if on_batch:
+            on_batch(batches, bookings, payments)
+    return total_bookings, total_payments
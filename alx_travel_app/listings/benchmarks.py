@@ -0,0 +1,269 @@
+# listings/benchmarks.py
+"""
+Helpers shared by the benchmark management commands: dataset seeding,
+latency/query measurement, renderer encode cost, a stubbed Chapa gateway
+and process startup measurement.
+"""
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .models import Property, Booking, Review
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(call, iterations, warmup=0, expected_status=None):
+    """
+    Run call(i) warmup + iterations times and summarise the timed runs.
+    call must return a response object; a status other than expected_status
+    aborts the run so a broken endpoint is not benchmarked as a fast one.
+    """
+    latencies = []
+    queries = []
+    started = time.perf_counter()
+    for i in range(warmup + iterations):
+        if i == warmup:
+            started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            response = call(i)
+            elapsed = time.perf_counter() - t0
+        if expected_status is not None and response.status_code != expected_status:
+            raise RuntimeError(
+                f'Expected status {expected_status}, got {response.status_code}: '
+                f'{getattr(response, "content", b"")[:200]!r}'
+            )
+        if i >= warmup:
+            latencies.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+    total = time.perf_counter() - started
+
+    return {
+        'iterations': iterations,
+        'total_s': round(total, 4),
+        'throughput_rps': round(iterations / total, 2) if total else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 3),
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else 0,
+        'queries_max': max(queries, default=0),
+    }
+
+
+def measure_renderers(data, renderers, iterations):
+    """
+    Encode data with each renderer iterations times and report encode
+    latency and payload size, e.g. to compare JSON with MessagePack.
+    """
+    results = {}
+    for renderer in renderers:
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            payload = renderer.render(data, renderer.media_type, {})
+            timings.append(time.perf_counter() - t0)
+        results[renderer.format] = {
+            'media_type': renderer.media_type,
+            'encode_mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+            'encode_p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'payload_bytes': len(payload),
+        }
+    return results
+
+
+def seed_dataset(users, properties, bookings_per_property, reviews_per_property, seed=42):
+    """
+    Bulk-create a synthetic dataset. Bookings are laid out back to back in
+    the past so they never overlap and future dates stay free for writes.
+    """
+    rng = random.Random(seed)
+
+    User.objects.bulk_create([
+        User(username=f'bench_user_{i}', email=f'bench_user_{i}@example.com')
+        for i in range(users)
+    ])
+    # bulk_create only sets auto-increment primary keys on some backends
+    user_objs = list(User.objects.filter(username__startswith='bench_user_'))
+
+    property_objs = [
+        Property(
+            host=rng.choice(user_objs),
+            name=f'Bench Property {i}',
+            description=f'Benchmark property {i}',
+            location=f'Location {i % 25}',
+            pricepernight=Decimal(rng.randint(3000, 25000)),
+        )
+        for i in range(properties)
+    ]
+    Property.objects.bulk_create(property_objs)
+
+    booking_objs = []
+    review_objs = []
+    first_night = date.today() - timedelta(days=30 * bookings_per_property + 30)
+    for property_obj in property_objs:
+        start = first_night
+        for _ in range(bookings_per_property):
+            nights = rng.randint(1, 14)
+            end = start + timedelta(days=nights)
+            booking = Booking(
+                property=property_obj,
+                user=rng.choice(user_objs),
+                start_date=start,
+                end_date=end,
+                total_price=property_obj.pricepernight * nights,
+                status=rng.choice(['confirmed', 'confirmed', 'canceled']),
+            )
+            # bulk_create skips save(), which normally fills the snapshot
+            booking.fill_snapshot()
+            booking_objs.append(booking)
+            start = end + timedelta(days=rng.randint(0, 14))
+        reviewers = rng.sample(user_objs, min(reviews_per_property, len(user_objs)))
+        for reviewer in reviewers:
+            review_objs.append(Review(
+                property=property_obj,
+                user=reviewer,
+                rating=rng.randint(1, 5),
+                comment='Benchmark review',
+            ))
+    Booking.objects.bulk_create(booking_objs)
+    Review.objects.bulk_create(review_objs)
+
+    return user_objs, property_objs, booking_objs
+
+
+class StubGatewayResponse:
+    """Minimal stand-in for a successful Chapa initialize response"""
+    status_code = 200
+
+    def __init__(self, tx_ref):
+        self.tx_ref = tx_ref
+
+    def json(self):
+        return {
+            'status': 'success',
+            'message': 'Hosted Link',
+            'data': {
+                'tx_ref': self.tx_ref,
+                'checkout_url': f'https://checkout.chapa.co/checkout/payment/{self.tx_ref}',
+            },
+        }
+
+
+def stub_gateway_post(url, json=None, headers=None, **kwargs):
+    """Replacement for requests.post that never leaves the process"""
+    return StubGatewayResponse((json or {}).get('tx_ref'))
+
+
+def git_revision():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Code run in a fresh interpreter to reproduce each kind of process startup
+STARTUP_TARGETS = {
+    'web': (
+        'from alx_travel_app.wsgi import application\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+    'worker': (
+        'from alx_travel_app import celery_app\n'
+        'import django\n'
+        'django.setup()\n'
+        'celery_app.loader.import_default_modules()\n'
+    ),
+    'command': (
+        'import django\n'
+        'django.setup()\n'
+        'from django.core.management import load_command_class\n'
+        'load_command_class("listings", "populate_db")\n'
+    ),
+}
+
+# Modules each kind of process should not import while starting up.
+# rest_framework.compat imports requests whenever it is installed, and the
+# worker loads the URLconf through Django's system checks, so requests is
+# only checked where DRF is not loaded.
+STARTUP_FORBIDDEN = {
+    'web': ['drf_yasg', 'django_seed', 'faker', 'celery'],
+    'worker': ['drf_yasg', 'django_seed', 'faker'],
+    'command': ['requests', 'drf_yasg', 'django_seed', 'faker', 'celery'],
+}
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into (total_us, {module: cumulative_us}).
+    The total is the sum of top-level imports.
+    """
+    total = 0
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        cumulative_us = int(cumulative)
+        module = name.strip()
+        # Top-level imports are indented by a single space
+        if len(name) - len(name.lstrip(' ')) == 1:
+            total += cumulative_us
+        modules[module] = max(cumulative_us, modules.get(module, 0))
+    return total, modules
+
+
+def measure_startup(target, repeats=3, top=10):
+    """
+    Start a fresh interpreter repeats times for a STARTUP_TARGETS entry and
+    report median wall and import times, the slowest imports and any
+    STARTUP_FORBIDDEN module that was loaded.
+    """
+    project_dir = Path(__file__).resolve().parent.parent
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')}
+    walls, imports = [], []
+    modules = {}
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_TARGETS[target]],
+            cwd=project_dir, env=env, capture_output=True, text=True,
+        )
+        walls.append(time.perf_counter() - t0)
+        if proc.returncode != 0:
+            errors = [l for l in proc.stderr.splitlines() if not l.startswith('import time:')]
+            raise RuntimeError(f'{target} startup failed: ' + '\n'.join(errors[-5:]))
+        total, modules = parse_importtime(proc.stderr)
+        imports.append(total / 1_000_000)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'repeats': repeats,
+        'wall_ms': round(percentile(walls, 50) * 1000, 1),
+        'import_ms': round(percentile(imports, 50) * 1000, 1),
+        'slowest_imports_ms': {name: round(us / 1000, 1) for name, us in slowest},
+        'forbidden_imports': [m for m in STARTUP_FORBIDDEN[target] if m in modules],
+    }
@@ -0,0 +1,101 @@
+# listings/gateway_stub.py
+"""
+A local stand-in for the Chapa API, for load tests of the payment flow.
+
+Point CHAPA_API_URL at the stub (e.g. http://127.0.0.1:8901/v1) and it
+answers transaction/initialize like Chapa does, after a configurable
+latency. A share of requests can fail with a 500 or hang long enough to
+trip PAYMENT_GATEWAY_TIMEOUT.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GatewayStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=50, jitter_ms=0, error_rate=0.0,
+                 timeout_rate=0.0, hang_seconds=30, seed=None):
+        super().__init__(address, GatewayStubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'ok': 0, 'error': 0, 'timeout': 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def pick_outcome(self):
+        """('ok' | 'error' | 'timeout', delay in seconds) for the next request"""
+        with self.lock:
+            roll = self.rng.random()
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            if roll < self.timeout_rate:
+                outcome = 'timeout'
+            elif roll < self.timeout_rate + self.error_rate:
+                outcome = 'error'
+            else:
+                outcome = 'ok'
+            self.counts[outcome] += 1
+        if outcome == 'timeout':
+            return outcome, self.hang_seconds
+        return outcome, max(0, self.latency_ms + jitter) / 1000
+
+
+class GatewayStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self.reply(400, {'status': 'failed', 'message': 'Invalid JSON'})
+        if not self.path.rstrip('/').endswith('/transaction/initialize'):
+            return self.reply(404, {'status': 'failed', 'message': 'Not found'})
+
+        outcome, delay = self.server.pick_outcome()
+        time.sleep(delay)
+        if outcome == 'error':
+            return self.reply(500, {'status': 'failed', 'message': 'Stub gateway error'})
+        # A timed out client has gone away by now; the reply is just dropped
+        tx_ref = payload.get('tx_ref')
+        self.reply(200, {
+            'status': 'success',
+            'message': 'Hosted Link',
+            'data': {
+                'tx_ref': tx_ref,
+                'checkout_url': f'https://checkout.chapa.co/checkout/payment/{tx_ref}',
+            },
+        })
+
+    def reply(self, status, body):
+        content = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # One line per request would drown out a load test
+        pass
+
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """Start a GatewayStubServer in a background thread and return it"""
+    server = GatewayStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,129 @@
+# listings/loadtest.py
+"""
+Concurrent load driver for the booking -> payment flow of a running server.
+
+Each flow creates a booking in a window no other booking uses and then
+initiates its payment, so every request does real work. Run the server
+against `manage.py run_gateway_stub` to keep Chapa out of the loop, and
+with the booking/payment throttles disabled unless they are under test.
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+from .benchmarks import percentile
+
+STEPS = ('booking', 'payment', 'flow')
+
+
+def discover_targets(session, base_url, properties, timeout=30):
+    """
+    Pick up to `properties` properties through the API and the first day
+    after every existing booking on them. Guests are the properties' hosts,
+    rotated so nobody books their own place when there is a choice.
+    """
+    response = session.get(f'{base_url}/api/properties/', timeout=timeout)
+    response.raise_for_status()
+    listed = response.json()[:properties]
+    if not listed:
+        raise ValueError('The server has no properties; seed it with populate_db first')
+
+    first_free = date.today() + timedelta(days=1)
+    for item in listed:
+        history = session.get(
+            f'{base_url}/api/properties/{item["property_id"]}/bookings/history/', timeout=timeout
+        )
+        history.raise_for_status()
+        for booking in history.json():
+            first_free = max(first_free, date.fromisoformat(booking['end_date']) + timedelta(days=1))
+
+    hosts = sorted({item['host']['id'] for item in listed})
+    targets = []
+    for item in listed:
+        guests = [host for host in hosts if host != item['host']['id']] or hosts
+        targets.append((item['property_id'], guests))
+    return targets, first_free
+
+
+def plan_flows(targets, first_free, count):
+    """(property_id, user_id, start_date, end_date) for count non-overlapping one-night stays"""
+    flows = []
+    for n in range(count):
+        property_id, guests = targets[n % len(targets)]
+        start = first_free + timedelta(days=2 * (n // len(targets)))
+        flows.append((property_id, guests[n % len(guests)], start, start + timedelta(days=1)))
+    return flows
+
+
+def _post(session, url, timeout, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        response = session.post(url, timeout=timeout, **kwargs)
+        outcome = response.status_code
+    except requests.Timeout:
+        response, outcome = None, 'timeout'
+    except requests.ConnectionError:
+        response, outcome = None, 'connection_error'
+    return response, outcome, time.perf_counter() - t0
+
+
+def run_flow(session, base_url, flow, timeout):
+    """Book and pay once, returning {step: (outcome, seconds)}"""
+    property_id, user_id, start, end = flow
+    response, outcome, elapsed = _post(session, f'{base_url}/api/bookings/', timeout, json={
+        'property_id': str(property_id),
+        'user_id': user_id,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+    })
+    result = {'booking': (outcome, elapsed)}
+    total = elapsed
+    if outcome == 201:
+        booking_id = response.json()['booking_id']
+        _, outcome, elapsed = _post(session, f'{base_url}/api/payments/{booking_id}/initiate/', timeout)
+        result['payment'] = (outcome, elapsed)
+        total += elapsed
+    result['flow'] = ('ok' if result.get('payment', (None,))[0] == 201 else 'failed', total)
+    return result
+
+
+def summarize(results, elapsed):
+    report = {
+        'flows': len(results),
+        'duration_s': round(elapsed, 3),
+        'throughput_flows_per_s': round(len(results) / elapsed, 2) if elapsed else None,
+    }
+    for step in STEPS:
+        samples = [result[step] for result in results if step in result]
+        latencies = [seconds for _, seconds in samples]
+        report[step] = {
+            'outcomes': {str(k): v for k, v in sorted(Counter(o for o, _ in samples).items(), key=str)},
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(max(latencies, default=0.0) * 1000, 2),
+        }
+    ok = report['flow']['outcomes'].get('ok', 0)
+    report['successful_flows_per_s'] = round(ok / elapsed, 2) if elapsed else None
+    return report
+
+
+def run_load(base_url, flows, concurrency, timeout=30):
+    """Run the planned flows with `concurrency` workers and summarize them"""
+    base_url = base_url.rstrip('/')
+    local = threading.local()
+
+    def work(flow):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return run_flow(local.session, base_url, flow, timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(work, flows))
+    return summarize(results, time.perf_counter() - started)
@@ -0,0 +1,75 @@
+# listings/management/commands/archive_bookings.py
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.archive import archivable_bookings, archive_bookings, partition_archive_table
+
+
+class Command(BaseCommand):
+    help = 'Move completed and canceled bookings (and their payments) to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+            help='Archive bookings that ended more than this many days ago '
+                 f'(default: {settings.BOOKING_ARCHIVE_AFTER_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BOOKING_ARCHIVE_BATCH_SIZE,
+            help=f'Bookings per transaction (default: {settings.BOOKING_ARCHIVE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many batches; the next run resumes from there'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many bookings would be archived'
+        )
+        parser.add_argument(
+            '--setup-partitions',
+            action='store_true',
+            help='Convert the empty archive table to yearly start_date partitions (PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        if options['setup_partitions']:
+            try:
+                changed = partition_archive_table()
+            except ValueError as e:
+                raise CommandError(str(e))
+            if changed:
+                self.stdout.write(self.style.SUCCESS('Archive table is now partitioned by start_date.'))
+            else:
+                self.stdout.write('Archive table is already partitioned.')
+            return
+
+        if options['days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--days must be >= 0 and --batch-size >= 1.')
+
+        cutoff = date.today() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = archivable_bookings(cutoff).count()
+            self.stdout.write(f'{count} bookings ended before {cutoff} and would be archived.')
+            return
+
+        def report(batch, bookings, payments):
+            self.stdout.write(f'Batch {batch}: archived {bookings} bookings and {payments} payments')
+
+        bookings, payments = archive_bookings(
+            cutoff,
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            on_batch=report,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {bookings} bookings and {payments} payments ended before {cutoff}.')
+        )
@@ -0,0 +1,268 @@
+# listings/management/commands/benchmark_api.py
+import json
+import platform
+from datetime import date, timedelta
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from listings.benchmarks import (
+    measure, measure_renderers, seed_dataset, stub_gateway_post, git_revision
+)
+from listings.models import Property, Booking
+from listings.pricing import quote
+from listings.renderers import MessagePackRenderer
+from listings.serializers import PropertySerializer, BookingSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the listings API hot paths against a seeded dataset and '
+        'emit JSON results. All data is rolled back when the run finishes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Number of users to seed (default: 20)'
+        )
+        parser.add_argument(
+            '--properties',
+            type=int,
+            default=50,
+            help='Number of properties to seed (default: 50)'
+        )
+        parser.add_argument(
+            '--bookings-per-property',
+            type=int,
+            default=4,
+            help='Number of past bookings per property (default: 4)'
+        )
+        parser.add_argument(
+            '--reviews-per-property',
+            type=int,
+            default=3,
+            help='Number of reviews per property (default: 3)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Timed requests per scenario (default: 20)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Untimed requests per scenario before measuring (default: 2)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the generated dataset (default: 42)'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Only run the named scenario (can be repeated)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON results to this file instead of stdout'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Previous JSON results to print a per-scenario comparison against'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['properties'] < 1:
+            raise CommandError('At least 2 users and 1 property are required.')
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        # Throttles would turn the write scenarios into 429 benchmarks
+        rest_framework = {**getattr(settings, 'REST_FRAMEWORK', {}), 'DEFAULT_THROTTLE_RATES': {}}
+        with override_settings(ALLOWED_HOSTS=['testserver'], REST_FRAMEWORK=rest_framework):
+            with transaction.atomic():
+                results = self.run_benchmarks(options)
+                renderers = self.compare_renderers(options['iterations'])
+                # Never leave benchmark data behind
+                transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'git_revision': git_revision(),
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': {
+                    'users': options['users'],
+                    'properties': options['properties'],
+                    'bookings_per_property': options['bookings_per_property'],
+                    'reviews_per_property': options['reviews_per_property'],
+                    'seed': options['seed'],
+                },
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+            },
+            'results': results,
+            'renderers': renderers,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self.print_comparison(options['compare'], results)
+
+    def run_benchmarks(self, options):
+        users, properties, bookings = seed_dataset(
+            options['users'],
+            options['properties'],
+            options['bookings_per_property'],
+            options['reviews_per_property'],
+            seed=options['seed'],
+        )
+        if not bookings:
+            raise CommandError('At least 1 booking per property is required.')
+
+        client = Client()
+        # Bookings created by the write scenario go on a single property in
+        # consecutive windows, so every request passes the overlap check.
+        target = properties[0]
+        first_free = date.today() + timedelta(days=1)
+        guest = users[1] if users[0] == target.host else users[0]
+
+        def create_booking(i):
+            start = first_free + timedelta(days=2 * i)
+            return client.post('/api/bookings/', {
+                'property_id': str(target.property_id),
+                'user_id': guest.id,
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=1)).isoformat(),
+                'status': 'pending',
+            }, content_type='application/json')
+
+        def quote_ranges(i):
+            # 1000 quotes per iteration; rule sets are served from the cache
+            for n in range(1000):
+                property_obj = properties[n % len(properties)]
+                start = first_free + timedelta(days=n % 90)
+                quote(property_obj.property_id, start, start + timedelta(days=1 + n % 14))
+
+        def quote_batch(i):
+            start = first_free + timedelta(days=i % 90)
+            return client.post('/api/quotes/', {'items': [
+                {
+                    'property_id': str(properties[(i + n) % len(properties)].property_id),
+                    'start_date': start.isoformat(),
+                    'end_date': (start + timedelta(days=1 + n % 7)).isoformat(),
+                }
+                for n in range(50)
+            ]}, content_type='application/json')
+
+        # Payments are refused for canceled bookings, so pay for confirmed ones
+        payable = [booking for booking in bookings if booking.is_blocking()]
+        if not payable:
+            payable = bookings[:1]
+            Booking.objects.filter(pk=payable[0].pk).update(status='confirmed', updated_at=timezone.now())
+
+        def initiate_payment(i):
+            booking = payable[i % len(payable)]
+            return client.post(f'/api/payments/{booking.booking_id}/initiate/')
+
+        scenarios = {
+            'property_list': (
+                lambda i: client.get('/api/properties/'), 200),
+            'property_detail': (
+                lambda i: client.get(f'/api/properties/{properties[i % len(properties)].property_id}/'), 200),
+            'booking_list': (
+                lambda i: client.get('/api/bookings/'), 200),
+            'property_list_msgpack': (
+                lambda i: client.get('/api/properties/', HTTP_ACCEPT='application/msgpack'), 200),
+            'booking_list_msgpack': (
+                lambda i: client.get('/api/bookings/', HTTP_ACCEPT='application/msgpack'), 200),
+            'booking_list_nested': (
+                lambda i: client.get(f'/api/properties/{properties[i % len(properties)].property_id}/bookings/'), 200),
+            'booking_history': (
+                lambda i: client.get('/api/bookings/history/'), 200),
+            'booking_create': (create_booking, 201),
+            'pricing_quote_1000': (quote_ranges, None),
+            'quote_batch_50': (quote_batch, 200),
+            'payment_initiate': (initiate_payment, 201),
+        }
+
+        selected = options['scenarios'] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f'Unknown scenario(s): {", ".join(sorted(unknown))}. '
+                f'Choose from: {", ".join(scenarios)}'
+            )
+
+        results = {}
+        with mock.patch('requests.post', side_effect=stub_gateway_post):
+            for name in selected:
+                call, expected_status = scenarios[name]
+                self.stderr.write(f'Running {name}...')
+                try:
+                    results[name] = measure(
+                        call, options['iterations'], options['warmup'], expected_status
+                    )
+                except RuntimeError as e:
+                    raise CommandError(f'{name}: {e}')
+        return results
+
+    def compare_renderers(self, iterations):
+        """Encode time and payload size of the list payloads per renderer"""
+        renderers = [JSONRenderer(), MessagePackRenderer()]
+        payloads = {
+            'property_list': PropertySerializer(Property.objects.all(), many=True).data,
+            'booking_list': BookingSerializer(Booking.objects.all(), many=True).data,
+        }
+        return {
+            name: measure_renderers(data, renderers, iterations)
+            for name, data in payloads.items()
+        }
+
+    def print_comparison(self, path, results):
+        """Print p50/p99/throughput/query deltas against an earlier run"""
+        try:
+            with open(path) as fh:
+                previous = json.load(fh)['results']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Could not read comparison file {path}: {e}')
+
+        self.stdout.write(f'\nComparison against {path}:')
+        for name, current in results.items():
+            before = previous.get(name)
+            if not before:
+                self.stdout.write(f'  {name}: no previous result')
+                continue
+            parts = []
+            for key in ('p50_ms', 'p99_ms', 'throughput_rps', 'queries_mean'):
+                old, new = before.get(key), current.get(key)
+                if old:
+                    parts.append(f'{key} {old} -> {new} ({(new - old) / old * 100:+.1f}%)')
+                else:
+                    parts.append(f'{key} {old} -> {new}')
+            self.stdout.write(f'  {name}: ' + ', '.join(parts))
@@ -0,0 +1,73 @@
+# listings/management/commands/benchmark_startup.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.benchmarks import STARTUP_TARGETS, measure_startup, git_revision
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start of the web, worker and management command '
+        'processes with `python -X importtime` and emit JSON results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            dest='targets',
+            choices=sorted(STARTUP_TARGETS),
+            help='Only measure the named process (can be repeated)'
+        )
+        parser.add_argument(
+            '--repeats',
+            type=int,
+            default=3,
+            help='Fresh interpreters started per target (default: 3)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of slowest imports to report (default: 10)'
+        )
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            help='Fail if any target spends longer than this importing modules'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON results to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeats'] < 1:
+            raise CommandError('--repeats must be at least 1.')
+
+        results = {}
+        for target in options['targets'] or STARTUP_TARGETS:
+            try:
+                results[target] = measure_startup(target, options['repeats'], options['top'])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        output = json.dumps({'meta': {'git_revision': git_revision()}, 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+        problems = []
+        for target, result in results.items():
+            if result['forbidden_imports']:
+                problems.append(f'{target} imports {", ".join(result["forbidden_imports"])}')
+            if options['budget_ms'] and result['import_ms'] > options['budget_ms']:
+                problems.append(
+                    f'{target} spends {result["import_ms"]} ms importing (budget {options["budget_ms"]} ms)'
+                )
+        if problems:
+            raise CommandError('; '.join(problems))
@@ -0,0 +1,39 @@
+# listings/management/commands/generate_api_schema.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from alx_travel_app.schema import FORMATS, generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema served at /swagger.json/ and /swagger.yaml/. '
+        'Run once per deploy so web processes never have to build it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            action='append',
+            dest='formats',
+            choices=sorted(FORMATS),
+            help='Only write the given format (can be repeated)'
+        )
+        parser.add_argument(
+            '--output-dir',
+            help='Directory to write openapi.<format> to (default: API_SCHEMA_DIR)'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['output_dir'] or settings.API_SCHEMA_DIR
+        os.makedirs(directory, exist_ok=True)
+        for fmt in options['formats'] or FORMATS:
+            path = schema_path(fmt, directory)
+            content = generate_schema(fmt)
+            # Replace atomically so a running process never reads half a file
+            with open(path + '.tmp', 'wb') as fh:
+                fh.write(content)
+            os.replace(path + '.tmp', path)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path} ({len(content)} bytes)'))
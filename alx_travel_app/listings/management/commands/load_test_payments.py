@@ -0,0 +1,89 @@
+# listings/management/commands/load_test_payments.py
+import json
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.benchmarks import git_revision
+from listings.loadtest import discover_targets, plan_flows, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent booking -> payment flows against a running server and '
+        'report throughput and tail latency per step as JSON. Run the server with '
+        'CHAPA_API_URL pointing at `manage.py run_gateway_stub`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000',
+            help='Server to load (default: http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--flows',
+            type=int,
+            default=200,
+            help='Booking -> payment flows to run (default: 200)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=10,
+            help='Flows in flight at once (default: 10)'
+        )
+        parser.add_argument(
+            '--properties',
+            type=int,
+            default=20,
+            help='Properties to spread bookings over (default: 20)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30,
+            help='Client timeout per request in seconds (default: 30)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON results to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        if options['flows'] < 1 or options['concurrency'] < 1 or options['properties'] < 1:
+            raise CommandError('--flows, --concurrency and --properties must be at least 1.')
+
+        base_url = options['base_url'].rstrip('/')
+        try:
+            with requests.Session() as session:
+                targets, first_free = discover_targets(
+                    session, base_url, options['properties'], options['timeout']
+                )
+        except (requests.RequestException, ValueError) as e:
+            raise CommandError(f'Could not prepare the load test against {base_url}: {e}')
+
+        flows = plan_flows(targets, first_free, options['flows'])
+        self.stderr.write(
+            f'Running {len(flows)} flows over {len(targets)} properties '
+            f'with concurrency {options["concurrency"]}...'
+        )
+        results = run_load(base_url, flows, options['concurrency'], options['timeout'])
+
+        report = {
+            'meta': {
+                'git_revision': git_revision(),
+                'base_url': base_url,
+                'concurrency': options['concurrency'],
+                'properties': len(targets),
+                'first_night': first_free.isoformat(),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -5,6 +5,7 @@ from datetime import date, timedelta
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from listings.models import Property, Booking, Review
+from listings.pricing import quote
 
 
 class Command(BaseCommand):
@@ -239,18 +240,15 @@ class Command(BaseCommand):
             guest_user = random.choice([u for u in users if u != property_obj.host])
             
             # Check for overlapping bookings
-            overlapping = Booking.objects.filter(
-                property=property_obj,
-                status__in=['pending', 'confirmed'],
-                start_date__lt=end_date,
-                end_date__gt=start_date
-            )
+            overlapping = Booking.objects.blocking().overlapping(
+                start_date, end_date
+            ).filter(property=property_obj)
             
             if overlapping.exists():
                 # Skip this booking to avoid conflicts
                 continue
             
-            total_price = property_obj.pricepernight * nights
+            total_price = quote(property_obj.property_id, start_date, end_date).total
             status = random.choice(booking_statuses)
             
             booking = Booking.objects.create(
@@ -0,0 +1,19 @@
+# listings/management/commands/refresh_host_stats.py
+from django.core.management.base import BaseCommand
+
+from listings.stats import refresh_property_stats
+
+
+class Command(BaseCommand):
+    help = 'Refresh the per-property monthly booking stats used by the host stats endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild from every confirmed booking instead of only recent changes'
+        )
+
+    def handle(self, *args, **options):
+        months = refresh_property_stats(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {months} property months.'))
@@ -0,0 +1,84 @@
+# listings/management/commands/run_gateway_stub.py
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.gateway_stub import GatewayStubServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local stand-in for the Chapa API with configurable latency, '
+        'errors and timeouts. Point CHAPA_API_URL at the printed URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            default='127.0.0.1',
+            help='Interface to listen on (default: 127.0.0.1)'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8901,
+            help='Port to listen on (default: 8901)'
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=50,
+            help='Response latency in milliseconds (default: 50)'
+        )
+        parser.add_argument(
+            '--jitter-ms',
+            type=float,
+            default=0,
+            help='Uniform +/- variation of the latency (default: 0)'
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Share of requests answered with a 500, 0-1 (default: 0)'
+        )
+        parser.add_argument(
+            '--timeout-rate',
+            type=float,
+            default=0.0,
+            help='Share of requests that hang for --hang-seconds, 0-1 (default: 0)'
+        )
+        parser.add_argument(
+            '--hang-seconds',
+            type=float,
+            default=30,
+            help='How long a timed out request hangs (default: 30)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed for reproducible error and timeout patterns'
+        )
+
+    def handle(self, *args, **options):
+        for rate in ('error_rate', 'timeout_rate'):
+            if not 0 <= options[rate] <= 1:
+                raise CommandError(f'--{rate.replace("_", "-")} must be between 0 and 1.')
+        if options['error_rate'] + options['timeout_rate'] > 1:
+            raise CommandError('--error-rate and --timeout-rate must add up to at most 1.')
+
+        server = GatewayStubServer(
+            (options['host'], options['port']),
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            timeout_rate=options['timeout_rate'],
+            hang_seconds=options['hang_seconds'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Gateway stub listening, set CHAPA_API_URL={server.url}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Requests served: {server.counts}')
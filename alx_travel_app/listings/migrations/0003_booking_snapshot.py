@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+def backfill_snapshot(apps, schema_editor):
+    """
+    Fill the snapshot columns for existing bookings. The price at booking
+    time was never recorded, so the property's current price is used.
+    """
+    Booking = apps.get_model('listings', 'Booking')
+    batch = []
+    queryset = Booking.objects.select_related('property', 'user').order_by('pk')
+    for booking in queryset.iterator(chunk_size=1000):
+        booking.property_name = booking.property.name
+        booking.property_location = booking.property.location
+        booking.pricepernight = booking.property.pricepernight
+        booking.guest_username = booking.user.username
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(
+                batch, ['property_name', 'property_location', 'pricepernight', 'guest_username']
+            )
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(
+            batch, ['property_name', 'property_location', 'pricepernight', 'guest_username']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_alter_booking_options_alter_property_options_payment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='guest_username',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='pricepernight',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='property_location',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='property_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:27
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_booking_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule_type', models.CharField(choices=[('weekend', 'Weekend'), ('seasonal', 'Seasonal'), ('length_of_stay', 'Length of stay')], max_length=20)),
+                ('percent', models.DecimalField(decimal_places=2, default=Decimal('0'), help_text='Adjustment in percent, e.g. 20 for +20% or -10 for a 10% discount', max_digits=6, validators=[django.core.validators.MinValueValidator(Decimal('-99.99'))])),
+                ('nightly_price', models.DecimalField(blank=True, decimal_places=2, help_text='Seasonal rules only: replaces the nightly price instead of applying percent', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('start_date', models.DateField(blank=True, help_text='Seasonal rules only: first night', null=True)),
+                ('end_date', models.DateField(blank=True, help_text='Seasonal rules only: last night', null=True)),
+                ('min_nights', models.PositiveIntegerField(blank=True, help_text='Length of stay rules only: minimum nights for the discount to apply', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='listings.property')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_pricingrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('booking_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('property_id', models.UUIDField(db_index=True)),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('canceled', 'canceled')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('property_name', models.CharField(blank=True, default='', max_length=255)),
+                ('property_location', models.CharField(blank=True, default='', max_length=255)),
+                ('pricepernight', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('guest_username', models.CharField(blank=True, default='', max_length=150)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('booking_id', models.UUIDField(db_index=True)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('canceled', 'canceled')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('transaction_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'end_date'], name='booking_status_end_idx'),
+        ),
+    ]
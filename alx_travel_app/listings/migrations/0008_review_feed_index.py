@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['property', '-created_at'], name='review_property_created_idx'),
+        ),
+    ]
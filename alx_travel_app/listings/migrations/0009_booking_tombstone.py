@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_review_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTombstone',
+            fields=[
+                ('booking_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('property_id', models.UUIDField()),
+                ('user_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property_id', 'deleted_at'], name='tombstone_property_idx'), models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_idx')],
+            },
+        ),
+    ]
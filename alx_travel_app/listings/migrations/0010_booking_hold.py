@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:52
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_holds(apps, schema_editor):
+    """
+    Give existing pending bookings the hold they would have had, so
+    checkouts abandoned before holds existed expire on the next run.
+    """
+    Booking = apps.get_model('listings', 'Booking')
+    Booking.objects.filter(status='pending', hold_expires_at__isnull=True).update(
+        hold_expires_at=models.F('created_at') + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_booking_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='booking_hold_expiry_idx'),
+        ),
+        migrations.RunPython(backfill_holds, migrations.RunPython.noop),
+    ]
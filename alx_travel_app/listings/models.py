@@ -2,8 +2,9 @@ from django.db import models
 import uuid
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
 
 # Create your models here.
 class Property(models.Model):
@@ -31,6 +32,72 @@ class Property(models.Model):
         return f"{self.name} - {self.location}"
     
 
+class PricingRule(models.Model):
+    rule_choices = [
+        ("weekend", "Weekend"),
+        ("seasonal", "Seasonal"),
+        ("length_of_stay", "Length of stay"),
+    ]
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='pricing_rules')
+    rule_type = models.CharField(max_length=20, choices=rule_choices)
+    percent = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        default=Decimal('0'),
+        validators=[MinValueValidator(Decimal('-99.99'))],
+        help_text='Adjustment in percent, e.g. 20 for +20% or -10 for a 10% discount'
+    )
+    nightly_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text='Seasonal rules only: replaces the nightly price instead of applying percent'
+    )
+    start_date = models.DateField(null=True, blank=True, help_text='Seasonal rules only: first night')
+    end_date = models.DateField(null=True, blank=True, help_text='Seasonal rules only: last night')
+    min_nights = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Length of stay rules only: minimum nights for the discount to apply'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.rule_type == 'seasonal':
+            if not self.start_date or not self.end_date:
+                raise ValidationError('Seasonal rules need a start and end date')
+            if self.start_date > self.end_date:
+                raise ValidationError('End date must not be before start date')
+        if self.rule_type == 'length_of_stay' and not self.min_nights:
+            raise ValidationError('Length of stay rules need a minimum number of nights')
+
+    def __str__(self):
+        return f"{self.get_rule_type_display()} rule for {self.property_id}"
+
+
+class BookingQuerySet(models.QuerySet):
+    def blocking(self, now=None):
+        """Bookings that hold their dates: confirmed ones and pending ones still on hold"""
+        return self.filter(status__in=['pending', 'confirmed']).exclude(
+            status='pending', hold_expires_at__lte=now or timezone.now()
+        )
+
+    def expired_holds(self, now=None):
+        """Pending bookings whose hold has run out"""
+        return self.filter(status='pending', hold_expires_at__lte=now or timezone.now())
+
+    def overlapping(self, start_date, end_date):
+        """Bookings sharing at least one night with start_date..end_date"""
+        return self.filter(start_date__lt=end_date, end_date__gt=start_date)
+
+
 class Booking(models.Model):
     status_choices = [
         ("pending", "Pending"),
@@ -55,9 +122,48 @@ class Booking(models.Model):
         default='pending'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bulk update() calls must set this themselves, listings.stats relies on it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Pending bookings stop blocking their dates after this and are canceled
+    # by listings.holds; empty means the booking never expires
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+
+    # Snapshot of the property and guest at booking time, so historical
+    # reads and exports don't have to join Property and User
+    property_name = models.CharField(max_length=255, blank=True, default='')
+    property_location = models.CharField(max_length=255, blank=True, default='')
+    pricepernight = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    guest_username = models.CharField(max_length=150, blank=True, default='')
+
+    objects = BookingQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Finds finished bookings for listings.archive
+            models.Index(fields=['status', 'end_date'], name='booking_status_end_idx'),
+            # Default ordering of the API and admin lists
+            models.Index(fields=['-created_at'], name='booking_created_idx'),
+            # Finds expired holds for listings.holds
+            models.Index(fields=['status', 'hold_expires_at'], name='booking_hold_expiry_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember where the stay was, so moving it can refresh the old months
+        instance._loaded_stay = (
+            instance.__dict__.get('property_id'),
+            instance.__dict__.get('start_date'),
+            instance.__dict__.get('end_date'),
+        )
+        # And who it was for, so a booking moved to another property or guest
+        # gets a fresh snapshot
+        instance._loaded_parties = (
+            instance.__dict__.get('property_id'),
+            instance.__dict__.get('user_id'),
+        )
+        return instance
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -67,8 +173,66 @@ class Booking(models.Model):
             if self.start_date < date.today():
                 raise ValidationError('Start date cannot be in the past')
 
+    def fill_snapshot(self):
+        """Copy the current property and guest details onto the booking"""
+        self.property_name = self.property.name
+        self.property_location = self.property.location
+        self.pricepernight = self.property.pricepernight
+        self.guest_username = self.user.username
+
+    def hold_expired(self, now=None):
+        """Whether this is a pending booking whose hold has run out"""
+        return (
+            self.status == 'pending'
+            and self.hold_expires_at is not None
+            and self.hold_expires_at <= (now or timezone.now())
+        )
+
+    def is_blocking(self, now=None):
+        """Whether the booking holds its dates, as in BookingQuerySet.blocking()"""
+        return self.status in ('pending', 'confirmed') and not self.hold_expired(now)
+
+    def save(self, *args, **kwargs):
+        parties = (self.property_id, self.user_id)
+        loaded = getattr(self, '_loaded_parties', None)
+        if self._state.adding or (loaded is not None and loaded != parties):
+            self.fill_snapshot()
+        if self._state.adding:
+            if self.status == 'pending' and self.hold_expires_at is None:
+                self.hold_expires_at = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+        super().save(*args, **kwargs)
+        self._loaded_parties = parties
+
+    def __str__(self):
+        return f"Booking {self.booking_id} - {self.property_name}"
+
+
+class BookingTombstone(models.Model):
+    """
+    Left behind by a deleted (or archived) booking so delta sync can report
+    the deletion. Pruned after BOOKING_TOMBSTONE_RETENTION_DAYS.
+    """
+    booking_id = models.UUIDField(primary_key=True, editable=False)
+    property_id = models.UUIDField()
+    user_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property_id', 'deleted_at'], name='tombstone_property_idx'),
+            models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_idx'),
+        ]
+
+    @classmethod
+    def from_booking(cls, booking):
+        return cls(
+            booking_id=booking.booking_id,
+            property_id=booking.property_id,
+            user_id=booking.user_id,
+        )
+
     def __str__(self):
-        return f"Booking {self.booking_id} - {self.property.name}"
+        return f"Deleted booking {self.booking_id}"
 
 
 class Review(models.Model):
@@ -92,6 +256,10 @@ class Review(models.Model):
     class Meta:
         # Ensure a user can only review a property once
         unique_together = ['property', 'user']
+        indexes = [
+            # Review feed, newest first per property
+            models.Index(fields=['property', '-created_at'], name='review_property_created_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} for {self.property.name} - {self.rating}/5"
@@ -115,5 +283,117 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Admin status filter
+            models.Index(fields=['payment_status'], name='payment_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_id} - {self.payment_status}"
+
+
+class ArchivedBooking(models.Model):
+    """
+    Completed or canceled bookings moved out of the Booking table by
+    listings.archive. Relations are kept as plain ids so the archive
+    survives deleted properties and users and can be partitioned.
+    """
+    booking_id = models.UUIDField(primary_key=True, editable=False)
+    property_id = models.UUIDField(db_index=True)
+    user_id = models.IntegerField(db_index=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10, choices=Booking.status_choices)
+    created_at = models.DateTimeField()
+    property_name = models.CharField(max_length=255, blank=True, default='')
+    property_location = models.CharField(max_length=255, blank=True, default='')
+    pricepernight = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    guest_username = models.CharField(max_length=150, blank=True, default='')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start_date']
+
+    @classmethod
+    def from_booking(cls, booking):
+        return cls(
+            booking_id=booking.booking_id,
+            property_id=booking.property_id,
+            user_id=booking.user_id,
+            start_date=booking.start_date,
+            end_date=booking.end_date,
+            total_price=booking.total_price,
+            status=booking.status,
+            created_at=booking.created_at,
+            property_name=booking.property_name,
+            property_location=booking.property_location,
+            pricepernight=booking.pricepernight,
+            guest_username=booking.guest_username,
+        )
+
+    def __str__(self):
+        return f"Archived booking {self.booking_id} - {self.property_name}"
+
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    booking_id = models.UUIDField(db_index=True)
+    payment_status = models.CharField(max_length=10, choices=Payment.payment_choices)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    transaction_id = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def from_payment(cls, payment):
+        return cls(
+            id=payment.id,
+            booking_id=payment.booking_id,
+            payment_status=payment.payment_status,
+            amount=payment.amount,
+            transaction_id=payment.transaction_id,
+            created_at=payment.created_at,
+            updated_at=payment.updated_at,
+        )
+
+    def __str__(self):
+        return f"{self.booking_id} - {self.payment_status} (archived)"
+
+
+
+class PropertyMonthStats(models.Model):
+    """
+    Confirmed nights and revenue per property and calendar month, kept up
+    to date by listings.stats.refresh_property_stats.
+    """
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='month_stats')
+    month = models.DateField(help_text='First day of the month')
+    nights_booked = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0'))
+    # Set when a booking leaves this month, so the next refresh recomputes it
+    stale = models.BooleanField(default=False, db_index=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['property', 'month']
+        ordering = ['property', 'month']
+
+    def __str__(self):
+        return f"{self.property_id} {self.month:%Y-%m}: {self.nights_booked} nights"
+
+
+class StatsRefresh(models.Model):
+    """One row per refresh run; the latest started_at is the next watermark"""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    full = models.BooleanField(default=False)
+    months_refreshed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
     def __str__(self):
-        return f"{self.booking.booking_id} - {self.payment_status}"
\ No newline at end of file
+        return f"Stats refresh at {self.started_at:%Y-%m-%d %H:%M}"
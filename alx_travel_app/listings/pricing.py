@@ -0,0 +1,225 @@
+# listings/pricing.py
+"""
+Server-side booking prices.
+
+A property's pricing rules are compiled once into a CompiledRules object
+and kept in an in-process LRU cache, so quoting a date range is plain
+arithmetic over a handful of price segments rather than a query per night.
+Entries are dropped when a rule or the property changes (see signals.py)
+and expire after PRICING_RULE_CACHE_TTL seconds, which bounds how long
+other processes can serve prices from before a change.
+"""
+import bisect
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+
+from .models import Property, PricingRule
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+# Nights starting on Friday and Saturday
+WEEKEND_DAYS = (4, 5)
+
+Quote = namedtuple('Quote', ['nights', 'total'])
+
+
+def count_nights(start_date, end_date):
+    """Number of nights between two dates, 0 if either is missing"""
+    if start_date and end_date:
+        return (end_date - start_date).days
+    return 0
+
+
+def weekend_nights(start_date, nights):
+    """Number of weekend nights in a stay, without walking every night"""
+    weeks, remainder = divmod(nights, 7)
+    first = start_date.weekday()
+    extra = sum(1 for i in range(remainder) if (first + i) % 7 in WEEKEND_DAYS)
+    return weeks * len(WEEKEND_DAYS) + extra
+
+
+def apply_percent(amount, percent):
+    return amount * (HUNDRED + percent) / HUNDRED
+
+
+class CompiledRules:
+    """
+    A property's pricing rules flattened for fast quoting.
+
+    Seasons are turned into sorted, non-overlapping segments (where seasons
+    overlap, the one starting latest wins, then the one created last), so a
+    stay is priced one segment at a time.
+    """
+    __slots__ = ('pricepernight', 'weekend_percent', 'starts', 'ends', 'prices', 'stay_discounts')
+
+    def __init__(self, pricepernight, rules=()):
+        self.pricepernight = pricepernight
+        self.weekend_percent = None
+        self.stay_discounts = []
+        seasons = []
+
+        # rules are expected in creation order, so later rules win ties
+        for order, rule in enumerate(rules):
+            if rule.rule_type == 'weekend':
+                self.weekend_percent = rule.percent
+            elif rule.rule_type == 'length_of_stay' and rule.min_nights:
+                self.stay_discounts.append((rule.min_nights, rule.percent))
+            elif rule.rule_type == 'seasonal' and rule.start_date and rule.end_date:
+                if rule.nightly_price is not None:
+                    price = rule.nightly_price
+                else:
+                    price = apply_percent(pricepernight, rule.percent)
+                # end_date is the last night, segments use an exclusive end
+                seasons.append((rule.start_date, rule.end_date + timedelta(days=1), order, price))
+
+        # Longest stay requirement first, so the best matching tier is found first
+        self.stay_discounts.sort(reverse=True)
+        self.starts, self.ends, self.prices = self._segments(seasons)
+
+    @staticmethod
+    def _segments(seasons):
+        starts, ends, prices = [], [], []
+        if not seasons:
+            return starts, ends, prices
+        bounds = sorted({day for season in seasons for day in season[:2]})
+        for left, right in zip(bounds, bounds[1:]):
+            covering = [s for s in seasons if s[0] <= left and right <= s[1]]
+            if not covering:
+                continue
+            price = max(covering, key=lambda s: (s[0], s[2]))[3]
+            if ends and ends[-1] == left and prices[-1] == price:
+                ends[-1] = right
+            else:
+                starts.append(left)
+                ends.append(right)
+                prices.append(price)
+        return starts, ends, prices
+
+    def _piece_total(self, price, start_date, nights):
+        if self.weekend_percent is None:
+            return price * nights
+        weekend = weekend_nights(start_date, nights)
+        return price * (nights - weekend) + apply_percent(price, self.weekend_percent) * weekend
+
+    def quote(self, start_date, end_date):
+        nights = count_nights(start_date, end_date)
+        if nights <= 0:
+            return Quote(0, Decimal('0.00'))
+
+        total = Decimal('0')
+        day = start_date
+        # First segment that ends after the check-in night
+        index = bisect.bisect_right(self.ends, day)
+        while day < end_date:
+            if index < len(self.starts) and self.starts[index] <= day:
+                piece_end = min(end_date, self.ends[index])
+                price = self.prices[index]
+                index += 1
+            else:
+                piece_end = min(end_date, self.starts[index]) if index < len(self.starts) else end_date
+                price = self.pricepernight
+            total += self._piece_total(price, day, (piece_end - day).days)
+            day = piece_end
+
+        for min_nights, percent in self.stay_discounts:
+            if nights >= min_nights:
+                total = apply_percent(total, percent)
+                break
+
+        return Quote(nights, total.quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+class RuleCache:
+    """Thread-safe LRU cache of CompiledRules keyed by property_id"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation):
+        """Store value unless something was invalidated since it was loaded"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+rule_cache = RuleCache(
+    maxsize=getattr(settings, 'PRICING_RULE_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'PRICING_RULE_CACHE_TTL', 300),
+)
+
+
+def get_compiled_rules(property_ids):
+    """
+    Return {property_id: CompiledRules} for the given properties. Cache
+    misses are loaded together in two queries; unknown ids are left out.
+    """
+    found = {}
+    missing = []
+    for property_id in property_ids:
+        compiled = rule_cache.get(property_id)
+        if compiled is None:
+            missing.append(property_id)
+        else:
+            found[property_id] = compiled
+    if not missing:
+        return found
+
+    generation = rule_cache.generation
+    prices = dict(
+        Property.objects.filter(property_id__in=missing).values_list('property_id', 'pricepernight')
+    )
+    rules = defaultdict(list)
+    for rule in PricingRule.objects.filter(property_id__in=list(prices)).order_by('created_at', 'id'):
+        rules[rule.property_id].append(rule)
+
+    for property_id, pricepernight in prices.items():
+        compiled = CompiledRules(pricepernight, rules[property_id])
+        rule_cache.set(property_id, compiled, generation)
+        found[property_id] = compiled
+    return found
+
+
+def quote(property_id, start_date, end_date):
+    """Price a stay, raising Property.DoesNotExist for an unknown property"""
+    compiled = get_compiled_rules([property_id]).get(property_id)
+    if compiled is None:
+        raise Property.DoesNotExist(f'Property {property_id} does not exist')
+    return compiled.quote(start_date, end_date)
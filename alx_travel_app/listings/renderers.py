@@ -0,0 +1,39 @@
+# listings/renderers.py
+"""
+MessagePack renderer and parser for high-volume API clients.
+
+Clients opt in with `Accept: application/msgpack` (or ?format=msgpack) and
+can send bodies as `Content-Type: application/msgpack`; JSON stays the
+default. Values that JSON has no type for (UUIDs, decimals, datetimes) are
+encoded exactly as JSONRenderer encodes them, so both formats carry the
+same data.
+"""
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_encoder = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_json_encoder.default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
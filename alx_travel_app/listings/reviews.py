@@ -0,0 +1,91 @@
+# listings/reviews.py
+"""
+Review eligibility and the cached first page of each property's review feed.
+
+A guest may review a property once, after a confirmed stay there has
+ended; stays moved to the archive count too. The first page of a feed is
+cached under a per-property version that every review write bumps, so a
+page built from rows read before a write is never served after it.
+
+The bump only reaches the cache it is made in. With the default
+per-process cache, other processes keep serving their page until
+REVIEW_FEED_CACHE_TTL (15 seconds by default) runs out; a shared
+REVIEW_FEED_CACHE makes writes visible everywhere at once.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Property, Booking, ArchivedBooking, Review
+
+NOT_ELIGIBLE = "You can only review a property after a completed stay"
+ALREADY_REVIEWED = "You have already reviewed this property"
+UNKNOWN_USER = "User does not exist"
+UNKNOWN_PROPERTY = "Property does not exist"
+
+
+def check_eligibility(property_id, user_ids):
+    """
+    Map each of user_ids to None if they may review property_id, or to the
+    reason they may not. Runs a single query however many users are checked.
+    """
+    today = date.today()
+    rows = User.objects.filter(pk__in=user_ids).annotate(
+        property_exists=Exists(Property.objects.filter(pk=property_id)),
+        reviewed=Exists(Review.objects.filter(property_id=property_id, user=OuterRef('pk'))),
+        stayed=Exists(Booking.objects.filter(
+            property_id=property_id, user=OuterRef('pk'), status='confirmed', end_date__lte=today,
+        )),
+        stayed_archived=Exists(ArchivedBooking.objects.filter(
+            property_id=property_id, user_id=OuterRef('pk'), status='confirmed', end_date__lte=today,
+        )),
+    ).values_list('pk', 'property_exists', 'reviewed', 'stayed', 'stayed_archived')
+
+    reasons = dict.fromkeys(user_ids, UNKNOWN_USER)
+    for pk, property_exists, reviewed, stayed, stayed_archived in rows:
+        if not property_exists:
+            reasons[pk] = UNKNOWN_PROPERTY
+        elif reviewed:
+            reasons[pk] = ALREADY_REVIEWED
+        elif not (stayed or stayed_archived):
+            reasons[pk] = NOT_ELIGIBLE
+        else:
+            reasons[pk] = None
+    return reasons
+
+
+def _cache():
+    return caches[settings.REVIEW_FEED_CACHE]
+
+
+def _version_key(property_id):
+    return f'reviews:version:{property_id}'
+
+
+def get_first_page(property_id):
+    """(cached first page or None, version to store a freshly built page under)"""
+    cache = _cache()
+    version = cache.get(_version_key(property_id), 0)
+    return cache.get(f'reviews:page:{property_id}:{version}'), version
+
+
+def set_first_page(property_id, version, data):
+    _cache().set(f'reviews:page:{property_id}:{version}', data, settings.REVIEW_FEED_CACHE_TTL)
+
+
+def _bump(property_id):
+    cache = _cache()
+    try:
+        cache.incr(_version_key(property_id))
+    except ValueError:
+        cache.set(_version_key(property_id), 1, None)
+
+
+def invalidate_review_feed(property_id):
+    _bump(property_id)
+    # Again after commit, so a page read before the write commits is not kept
+    transaction.on_commit(lambda: _bump(property_id))
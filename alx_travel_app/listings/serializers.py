@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from .models import Property, Booking, Payment
+from .models import (
+    Property, Booking, Payment, PricingRule, ArchivedBooking, ArchivedPayment, Review
+)
+from . import pricing
+from .reviews import check_eligibility, invalidate_review_feed
+from .pricing import count_nights
 from django.contrib.auth.models import User
 from datetime import date
 
@@ -55,23 +60,56 @@ class BookingSerializer(serializers.ModelSerializer):
         fields = [
             'booking_id', 'property', 'property_id', 'user', 'user_id',
             'start_date', 'end_date', 'nights', 'total_price', 
-            'status', 'created_at'
+            'status', 'hold_expires_at', 'created_at'
         ]
-        read_only_fields = ['booking_id', 'created_at']
+        read_only_fields = ['booking_id', 'total_price', 'hold_expires_at', 'created_at']
 
     def get_nights(self, obj):
         """Calculate number of nights"""
-        if obj.start_date and obj.end_date:
-            return (obj.end_date - obj.start_date).days
-        return 0
+        return count_nights(obj.start_date, obj.end_date)
 
     def validate(self, data):
-        """Custom validation for booking dates and availability"""
+        """Custom validation for booking dates and availability, and pricing"""
+        dates_changed = any(
+            field in data for field in ('property_id', 'start_date', 'end_date')
+        )
         start_date = data.get('start_date')
         end_date = data.get('end_date')
-        property_data = data.get('property')
-        user_data = data.get('user')
-        
+        property_id = data.get('property_id')
+
+        # Partial updates are checked against the booking's current values
+        if self.instance:
+            # Delta sync scopes lists by property and guest; a booking moving
+            # between them would leave the old scope without a tombstone
+            if property_id and property_id != self.instance.property_id:
+                raise serializers.ValidationError(
+                    "A booking cannot be moved to another property, please book again"
+                )
+            if 'user_id' in data and data['user_id'] != self.instance.user_id:
+                raise serializers.ValidationError(
+                    "A booking cannot be moved to another guest, please book again"
+                )
+            start_date = start_date or self.instance.start_date
+            end_date = end_date or self.instance.end_date
+            property_id = property_id or self.instance.property_id
+
+            # Its dates may have been booked by someone else since
+            if self.instance.status == 'canceled' and data.get('status', 'canceled') != 'canceled':
+                raise serializers.ValidationError(
+                    "A canceled booking cannot be reactivated, please book again"
+                )
+
+        # An expired hold stopped blocking its dates, so confirming it has to
+        # check them again like a new booking
+        reactivated = (
+            self.instance is not None
+            and data.get('status') == 'confirmed'
+            and not self.instance.is_blocking()
+        )
+
+        if not (dates_changed or reactivated):
+            return data
+
         # Validate date range
         if start_date and end_date:
             if start_date >= end_date:
@@ -84,38 +122,199 @@ class BookingSerializer(serializers.ModelSerializer):
                     "Start date cannot be in the past"
                 )
             
-        if property_data and start_date and end_date:
+        if property_id and start_date and end_date:
             try:
-                property_instance = Property.objects.get(pk=property_data)
-                overlapping_bookings = property_instance.bookings.filter(
-                    status__in=['pending', 'confirmed'],
-                    start_date__lt=end_date,
-                    end_date__gt=start_date
-                )
-                
-                # Exclude current booking if updating
-                if self.instance:
-                    overlapping_bookings = overlapping_bookings.exclude(
-                        booking_id=self.instance.booking_id
-                    )
-                
-                if overlapping_bookings.exists():
-                    raise serializers.ValidationError(
-                        "Property is not available for the selected dates"
-                    )
+                # Rules are cached per property, so this rarely hits the DB
+                data['total_price'] = pricing.quote(property_id, start_date, end_date).total
             except Property.DoesNotExist:
                 raise serializers.ValidationError("Property does not exist")
 
+            overlapping_bookings = Booking.objects.blocking().overlapping(
+                start_date, end_date
+            ).filter(property_id=property_id)
+
+            # Exclude current booking if updating
+            if self.instance:
+                overlapping_bookings = overlapping_bookings.exclude(
+                    booking_id=self.instance.booking_id
+                )
+
+            if overlapping_bookings.exists():
+                raise serializers.ValidationError(
+                    "Property is not available for the selected dates"
+                )
+
         return data
 
-    def validate_total_price(self, total_price):
-        if total_price <= 0:
-            raise serializers.ValidationError("Total price must be greater than 0")
-        return total_price
+
+class BookingHistorySerializer(serializers.ModelSerializer):
+    """Flat, read-only booking rendered from the snapshot columns only"""
+    property_id = serializers.UUIDField(read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
+    nights = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Booking
+        fields = [
+            'booking_id', 'property_id', 'property_name', 'property_location',
+            'pricepernight', 'user_id', 'guest_username', 'start_date',
+            'end_date', 'nights', 'total_price', 'status', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_nights(self, obj):
+        """Calculate number of nights"""
+        return count_nights(obj.start_date, obj.end_date)
     
 
+
+class ReviewListSerializer(serializers.ListSerializer):
+    """Batch of reviews for one property, checked in one query and bulk-inserted"""
+
+    def to_internal_value(self, data):
+        # Checked here rather than in validate() so errors keep the per-item shape
+        attrs = super().to_internal_value(data)
+        reasons = check_eligibility(
+            self.context['property_id'], [item['user_id'] for item in attrs]
+        )
+        errors = []
+        seen = set()
+        for item in attrs:
+            reason = reasons[item['user_id']]
+            if reason is None and item['user_id'] in seen:
+                reason = "User appears more than once in the batch"
+            seen.add(item['user_id'])
+            errors.append({'non_field_errors': [reason]} if reason else {})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        reviews = Review.objects.bulk_create([Review(**item) for item in validated_data])
+        # bulk_create sends no post_save, so the feed is invalidated here
+        invalidate_review_feed(self.context['property_id'])
+        return list(
+            Review.objects.filter(pk__in=[review.pk for review in reviews])
+            .select_related('user').order_by('-created_at')
+        )
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    MAX_BATCH = 100
+
+    property_id = serializers.UUIDField(read_only=True)
+    user_id = serializers.IntegerField()
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ['review_id', 'property_id', 'user_id', 'username', 'rating', 'comment', 'created_at']
+        read_only_fields = ['review_id', 'created_at']
+        list_serializer_class = ReviewListSerializer
+
+    def validate_user_id(self, value):
+        if self.instance and value != self.instance.user_id:
+            raise serializers.ValidationError("The reviewer cannot be changed")
+        return value
+
+    def validate(self, data):
+        # Batches are checked by ReviewListSerializer in a single query
+        if self.instance is None and not isinstance(self.parent, serializers.ListSerializer):
+            reason = check_eligibility(self.context['property_id'], [data['user_id']])[data['user_id']]
+            if reason:
+                raise serializers.ValidationError(reason)
+        return data
+
+
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = ['id', 'booking', 'amount', 'payment_status', 'transaction_id', 'created_at', 'updated_at']
         read_only_fields = ['transaction_id', 'created_at', 'updated_at']
+
+
+class ArchivedPaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedPayment
+        fields = [
+            'id', 'booking_id', 'amount', 'payment_status', 'transaction_id',
+            'created_at', 'updated_at', 'archived_at'
+        ]
+        read_only_fields = fields
+
+
+class ArchivedBookingSerializer(serializers.ModelSerializer):
+    """Archived booking in the same shape as BookingHistorySerializer"""
+    nights = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedBooking
+        fields = [
+            'booking_id', 'property_id', 'property_name', 'property_location',
+            'pricepernight', 'user_id', 'guest_username', 'start_date',
+            'end_date', 'nights', 'total_price', 'status', 'created_at',
+            'archived_at'
+        ]
+        read_only_fields = fields
+
+    def get_nights(self, obj):
+        """Calculate number of nights"""
+        return count_nights(obj.start_date, obj.end_date)
+
+
+class QuoteItemSerializer(serializers.Serializer):
+    property_id = serializers.UUIDField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        if data['start_date'] >= data['end_date']:
+            raise serializers.ValidationError("End date must be after start date")
+        if data['start_date'] < date.today():
+            raise serializers.ValidationError("Start date cannot be in the past")
+        return data
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    MAX_ITEMS = 200
+
+    items = QuoteItemSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_ITEMS} items can be quoted at once"
+            )
+        return items
+
+
+class PricingRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PricingRule
+        fields = [
+            'id', 'rule_type', 'percent', 'nightly_price', 'start_date',
+            'end_date', 'min_nights', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+    def validate(self, data):
+        """Check that each rule type has the fields it needs"""
+        rule_type = data.get('rule_type', getattr(self.instance, 'rule_type', None))
+        start_date = data.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(self.instance, 'end_date', None))
+        min_nights = data.get('min_nights', getattr(self.instance, 'min_nights', None))
+
+        if rule_type == 'seasonal':
+            if not start_date or not end_date:
+                raise serializers.ValidationError(
+                    "Seasonal rules need a start and end date"
+                )
+            if start_date > end_date:
+                raise serializers.ValidationError(
+                    "End date must not be before start date"
+                )
+        if rule_type == 'length_of_stay' and not min_nights:
+            raise serializers.ValidationError(
+                "Length of stay rules need a minimum number of nights"
+            )
+        return data
@@ -0,0 +1,53 @@
+# listings/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Property, PricingRule, Booking, Review
+from .pricing import rule_cache
+from .reviews import invalidate_review_feed
+from .stats import mark_months_stale
+from .sync import record_deletion
+
+
+def invalidate_pricing(property_id):
+    rule_cache.invalidate(property_id)
+    # Again after commit, in case another request reloaded the old rules meanwhile
+    transaction.on_commit(lambda: rule_cache.invalidate(property_id))
+
+
+@receiver([post_save, post_delete], sender=PricingRule)
+def invalidate_rules_on_rule_change(sender, instance, **kwargs):
+    invalidate_pricing(instance.property_id)
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidate_rules_on_property_change(sender, instance, **kwargs):
+    # pricepernight is compiled into the cached rules
+    invalidate_pricing(instance.property_id)
+
+
+@receiver(post_save, sender=Booking)
+def mark_stats_stale_on_booking_move(sender, instance, created, **kwargs):
+    # The new months are found through updated_at, the old ones need flagging
+    loaded = getattr(instance, '_loaded_stay', None)
+    current = (instance.property_id, instance.start_date, instance.end_date)
+    if not created and loaded and loaded != current:
+        mark_months_stale(*loaded)
+    instance._loaded_stay = current
+
+
+@receiver(post_delete, sender=Booking)
+def mark_stats_stale_on_booking_delete(sender, instance, **kwargs):
+    mark_months_stale(instance.property_id, instance.start_date, instance.end_date)
+
+
+@receiver(post_delete, sender=Booking)
+def leave_tombstone_on_booking_delete(sender, instance, **kwargs):
+    # Lets delta sync clients drop the booking
+    record_deletion(instance)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_feed_on_review_change(sender, instance, **kwargs):
+    invalidate_review_feed(instance.property_id)
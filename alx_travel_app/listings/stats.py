@@ -0,0 +1,211 @@
+# listings/stats.py
+"""
+Per-property, per-month booking aggregates behind the host stats endpoint.
+
+PropertyMonthStats is refreshed incrementally: each run only recomputes
+the months touched by bookings updated since the previous run started
+(less REFRESH_OVERLAP), plus months flagged stale when a booking moved away or was deleted.
+Only confirmed bookings count; archived ones are included so history
+survives listings.archive.
+"""
+import calendar
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Avg, Sum
+from django.utils import timezone
+
+from .models import Booking, ArchivedBooking, Review, PropertyMonthStats, StatsRefresh
+
+CENT = Decimal('0.01')
+# A transaction that commits late can store an updated_at just before a
+# run's start, after that run read the bookings, so every run repeats this window
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+_tracking = threading.local()
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def days_in_month(month):
+    return calendar.monthrange(month.year, month.month)[1]
+
+
+def split_by_month(start_date, end_date):
+    """Yield (month, nights) for each calendar month a stay touches"""
+    day = start_date
+    while day < end_date:
+        boundary = min(end_date, next_month(month_start(day)))
+        yield month_start(day), (boundary - day).days
+        day = boundary
+
+
+@contextmanager
+def stale_tracking_paused():
+    """
+    Skip stale flagging for bookings whose stats stay valid, e.g. ones
+    moved to the archive, which recompute() still reads.
+    """
+    _tracking.paused = True
+    try:
+        yield
+    finally:
+        _tracking.paused = False
+
+
+def mark_months_stale(property_id, start_date, end_date):
+    """Flag the stats rows a stay contributed to for recomputation"""
+    if getattr(_tracking, 'paused', False):
+        return
+    if not (property_id and start_date and end_date):
+        return
+    months = [month for month, _ in split_by_month(start_date, end_date)]
+    PropertyMonthStats.objects.filter(property_id=property_id, month__in=months).update(stale=True)
+
+
+def _confirmed_stays(property_ids, window_start, window_end):
+    fields = ('property_id', 'start_date', 'end_date', 'total_price')
+    for model in (Booking, ArchivedBooking):
+        yield from model.objects.filter(
+            property_id__in=property_ids,
+            status='confirmed',
+            start_date__lt=window_end,
+            end_date__gt=window_start,
+        ).values_list(*fields)
+
+
+def recompute(keys):
+    """Rebuild the stats rows for a set of (property_id, month) keys"""
+    if not keys:
+        return 0
+    property_ids = {property_id for property_id, _ in keys}
+    window_start = min(month for _, month in keys)
+    window_end = next_month(max(month for _, month in keys))
+
+    nights = defaultdict(int)
+    revenue = defaultdict(Decimal)
+    for property_id, start_date, end_date, total_price in _confirmed_stays(
+        property_ids, window_start, window_end
+    ):
+        stay_nights = (end_date - start_date).days
+        allocated = Decimal('0')
+        pieces = list(split_by_month(start_date, end_date))
+        for i, (month, month_nights) in enumerate(pieces):
+            # Revenue is split by nights; the last month takes the rounding remainder
+            if i == len(pieces) - 1:
+                share = total_price - allocated
+            else:
+                share = (total_price * month_nights / stay_nights).quantize(CENT, rounding=ROUND_HALF_UP)
+            allocated += share
+            key = (property_id, month)
+            if key in keys:
+                nights[key] += month_nights
+                revenue[key] += share
+
+    PropertyMonthStats.objects.bulk_create(
+        [
+            PropertyMonthStats(
+                property_id=property_id,
+                month=month,
+                nights_booked=nights[(property_id, month)],
+                revenue=revenue[(property_id, month)],
+                stale=False,
+            )
+            for property_id, month in keys
+        ],
+        update_conflicts=True,
+        unique_fields=['property', 'month'],
+        update_fields=['nights_booked', 'revenue', 'stale', 'refreshed_at'],
+        batch_size=1000,
+    )
+    return len(keys)
+
+
+def refresh_property_stats(full=False):
+    """
+    Bring PropertyMonthStats up to date and return the number of months
+    recomputed. full=True rebuilds from every confirmed booking.
+    """
+    started_at = timezone.now()
+    last = StatsRefresh.objects.filter(finished_at__isnull=False).first()
+
+    keys = set()
+    if full or last is None:
+        changed = Booking.objects.filter(status='confirmed')
+        archived = ArchivedBooking.objects.filter(status='confirmed')
+        stays = list(changed.values_list('property_id', 'start_date', 'end_date'))
+        stays += archived.values_list('property_id', 'start_date', 'end_date')
+        full = True
+    else:
+        # Any status counts: a booking that stopped being confirmed must leave the totals
+        stays = Booking.objects.filter(updated_at__gte=last.started_at - REFRESH_OVERLAP).values_list(
+            'property_id', 'start_date', 'end_date'
+        )
+    for property_id, start_date, end_date in stays:
+        for month, _ in split_by_month(start_date, end_date):
+            keys.add((property_id, month))
+    keys.update(PropertyMonthStats.objects.filter(stale=True).values_list('property_id', 'month'))
+
+    with transaction.atomic():
+        refreshed = recompute(keys)
+        StatsRefresh.objects.create(
+            started_at=started_at,
+            finished_at=timezone.now(),
+            full=full,
+            months_refreshed=refreshed,
+        )
+    return refreshed
+
+
+def host_stats(host, first_month, last_month):
+    """Occupancy, revenue by month and average rating over a host's properties"""
+    property_count = host.properties.count()
+    rows = (
+        PropertyMonthStats.objects
+        .filter(property__host=host, month__gte=first_month, month__lte=last_month)
+        .values('month')
+        .annotate(nights=Sum('nights_booked'), total=Sum('revenue'))
+        .order_by('month')
+    )
+    by_month = {row['month']: row for row in rows}
+
+    months = []
+    total_nights = total_available = 0
+    total_revenue = Decimal('0')
+    month = first_month
+    while month <= last_month:
+        row = by_month.get(month, {})
+        nights = row.get('nights') or 0
+        revenue = row.get('total') or Decimal('0')
+        available = property_count * days_in_month(month)
+        months.append({
+            'month': month.strftime('%Y-%m'),
+            'nights_booked': nights,
+            'revenue': str(revenue.quantize(CENT)),
+            'occupancy_rate': round(nights / available, 4) if available else None,
+        })
+        total_nights += nights
+        total_available += available
+        total_revenue += revenue
+        month = next_month(month)
+
+    rating = Review.objects.filter(property__host=host).aggregate(avg=Avg('rating'))['avg']
+    return {
+        'host_id': host.pk,
+        'properties': property_count,
+        'nights_booked': total_nights,
+        'revenue': str(total_revenue.quantize(CENT)),
+        'occupancy_rate': round(total_nights / total_available, 4) if total_available else None,
+        'average_rating': round(rating, 2) if rating is not None else None,
+        'months': months,
+    }
@@ -0,0 +1,119 @@
+# listings/sync.py
+"""
+Conditional GET and delta sync for booking lists.
+
+Validators are derived from the booking rows: a list's ETag changes when a
+booking in it is added, updated (updated_at) or deleted (a
+BookingTombstone), so clients can revalidate with If-None-Match or
+If-Modified-Since instead of downloading the list again. `?since=` returns
+only the bookings updated since then plus the ids of deleted ones.
+
+Validators cover the booking rows only, not the live property and user
+details nested in each booking.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+
+from .models import BookingTombstone
+
+# A transaction that commits late can store an updated_at just before the
+# sync point handed out, so every sync repeats this window
+SYNC_OVERLAP = timedelta(seconds=5)
+
+_tracking = threading.local()
+
+
+class SyncExpired(Exception):
+    """The requested point is older than the retained tombstones"""
+
+
+@contextmanager
+def tombstones_paused():
+    """Skip per-row tombstones for callers that bulk-create their own"""
+    _tracking.paused = True
+    try:
+        yield
+    finally:
+        _tracking.paused = False
+
+
+def record_deletion(booking):
+    if getattr(_tracking, 'paused', False):
+        return
+    BookingTombstone.objects.create(
+        booking_id=booking.booking_id,
+        property_id=booking.property_id,
+        user_id=booking.user_id,
+    )
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones past the retention period, returning how many"""
+    horizon = (now or timezone.now()) - timedelta(days=settings.BOOKING_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = BookingTombstone.objects.filter(deleted_at__lt=horizon).delete()
+    return deleted
+
+
+def list_validators(bookings, tombstones):
+    """(etag, last_modified) of a booking list and its tombstones, in two queries"""
+    rows = bookings.order_by().aggregate(count=Count('pk'), latest=Max('updated_at'))
+    deleted = tombstones.aggregate(latest=Max('deleted_at'))['latest']
+    stamps = [stamp for stamp in (rows['latest'], deleted) if stamp]
+    key = f"{rows['count']}:{rows['latest']}:{deleted}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32], max(stamps, default=None)
+
+
+def booking_validators(booking):
+    key = f'{booking.booking_id}:{booking.updated_at}'
+    return hashlib.sha256(key.encode()).hexdigest()[:32], booking.updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 (or 412) response if the client's copy is current, else None"""
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def parse_since(value):
+    """ISO 8601 timestamp from ?since=, assumed UTC without an offset"""
+    since = parse_datetime(value.replace(' ', '+'))
+    if since is None:
+        raise ValueError(value)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def changes_since(bookings, tombstones, since):
+    """
+    (changed bookings, deleted booking ids, next since) for a client last
+    synced at since. Raises SyncExpired if deletions from then were pruned.
+    """
+    started = timezone.now()
+    if since < started - timedelta(days=settings.BOOKING_TOMBSTONE_RETENTION_DAYS):
+        raise SyncExpired(since)
+    changed = bookings.filter(updated_at__gte=since)
+    deleted = list(tombstones.filter(deleted_at__gte=since).values_list('booking_id', flat=True))
+    return changed, deleted, started - SYNC_OVERLAP
@@ -1,6 +1,13 @@
 from celery import shared_task
+# Make .delay() from web processes use the project's Celery configuration
+import alx_travel_app.celery  # noqa: F401
 from django.core.mail import send_mail
 from django.conf import settings
+from datetime import date, timedelta
+from .archive import archive_bookings
+from .holds import expire_holds
+from .stats import refresh_property_stats
+from .sync import prune_tombstones
 
 @shared_task
 def send_booking_confirmation_email(user_email, booking_id):
@@ -9,4 +16,36 @@ def send_booking_confirmation_email(user_email, booking_id):
     from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user_email]
     send_mail(subject, message, from_email, recipient_list)
-    return f'Confirmation email sent to {user_email}'
\ No newline at end of file
+    return f'Confirmation email sent to {user_email}'
+
+
+@shared_task
+def archive_old_bookings():
+    cutoff = date.today() - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+    bookings, payments = archive_bookings(
+        cutoff,
+        batch_size=settings.BOOKING_ARCHIVE_BATCH_SIZE,
+        max_batches=settings.BOOKING_ARCHIVE_MAX_BATCHES,
+    )
+    return f'Archived {bookings} bookings and {payments} payments'
+
+
+@shared_task
+def refresh_host_stats():
+    months = refresh_property_stats()
+    return f'Refreshed {months} property months'
+
+
+@shared_task
+def prune_booking_tombstones():
+    deleted = prune_tombstones()
+    return f'Pruned {deleted} booking tombstones'
+
+
+@shared_task
+def expire_booking_holds():
+    canceled = expire_holds(
+        batch_size=settings.BOOKING_HOLD_EXPIRY_BATCH_SIZE,
+        max_batches=settings.BOOKING_HOLD_EXPIRY_MAX_BATCHES,
+    )
+    return f'Canceled {canceled} expired booking holds'
@@ -1,3 +1,988 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from datetime import date, timedelta
+from decimal import Decimal
+
+import msgpack
+import requests
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest import mock
+
+from .models import (
+    Property, Booking, Payment, PricingRule, ArchivedBooking, ArchivedPayment, Review,
+    StatsRefresh,
+)
+from .admin import BookingAdmin
+from .archive import archive_bookings
+from .holds import expire_holds
+from .stats import refresh_property_stats
+from .sync import prune_tombstones
+from .gateway_stub import start_stub_server
+from .loadtest import discover_targets, plan_flows, run_load
+from .throttling import MemoryBucketStore, ConcurrencyLimiter, reset_bucket_store
+from .pricing import quote, rule_cache
+from .benchmarks import measure_startup
+from alx_travel_app import schema
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **getattr(settings, 'REST_FRAMEWORK', {}), 'DEFAULT_THROTTLE_RATES': rates,
+    })
+
+
+class ListingTestCase(TestCase):
+    """
+    A host, a guest and one property. Subclasses set the property's details
+    with the class attributes below.
+    """
+    property_name = 'Test Property'
+    property_location = 'Nairobi'
+    pricepernight = Decimal('100.00')
+
+    def setUp(self):
+        self.host = User.objects.create(username='host')
+        self.guest = User.objects.create(username='guest', email='guest@example.com')
+        self.property = self.make_property(self.property_name, self.property_location, self.pricepernight)
+
+    def make_property(self, name, location='Nairobi', pricepernight=Decimal('100.00')):
+        return Property.objects.create(
+            host=self.host, name=name, description='Sample', location=location,
+            pricepernight=pricepernight,
+        )
+
+    def make_booking(self, start, nights=1, status='pending', user=None, property_obj=None):
+        """A booking priced at the property's nightly rate"""
+        property_obj = property_obj or self.property
+        return Booking.objects.create(
+            property=property_obj, user=user or self.guest, start_date=start,
+            end_date=start + timedelta(days=nights),
+            total_price=property_obj.pricepernight * nights, status=status,
+        )
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_benchmark_reports_every_scenario_and_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.json')
+            call_command(
+                'benchmark_api', users=3, properties=2, bookings_per_property=2,
+                reviews_per_property=1, iterations=2, warmup=0, output=path,
+                stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(set(report['results']), {
+            'property_list', 'property_detail', 'booking_list',
+            'property_list_msgpack', 'booking_list_msgpack', 'booking_list_nested', 'booking_history', 'booking_create',
+            'pricing_quote_1000', 'quote_batch_50', 'payment_initiate',
+        })
+        for name, result in report['results'].items():
+            self.assertEqual(result['iterations'], 2)
+            if name != 'pricing_quote_1000':
+                self.assertGreater(result['queries_mean'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        for name in ('property_list', 'booking_list'):
+            sizes = report['renderers'][name]
+            self.assertLess(sizes['msgpack']['payload_bytes'], sizes['json']['payload_bytes'])
+        self.assertFalse(Property.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+
+
+class StartupBudgetTests(TestCase):
+    # Only the imports are checked here; wall-clock budgets depend on the
+    # machine and are enforced with `benchmark_startup --budget-ms` instead
+
+    def test_web_and_worker_skip_heavy_imports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'startup.json')
+            call_command(
+                'benchmark_startup', targets=['web', 'worker'], repeats=1,
+                output=path, stdout=io.StringIO(),
+            )
+            with open(path) as fh:
+                results = json.load(fh)['results']
+
+        self.assertEqual(set(results), {'web', 'worker'})
+        for result in results.values():
+            self.assertEqual(result['forbidden_imports'], [])
+            self.assertNotIn('drf_yasg', ' '.join(result['slowest_imports_ms']))
+
+    def test_command_does_not_import_requests(self):
+        result = measure_startup('command', repeats=1)
+        self.assertEqual(result['forbidden_imports'], [])
+
+
+class SchemaTests(TestCase):
+    def setUp(self):
+        schema.clear_schema_cache()
+        self.addCleanup(schema.clear_schema_cache)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.schema_dir = tmp.name
+
+    def test_schema_is_generated_once_and_revalidated_with_etag(self):
+        with override_settings(API_SCHEMA_DIR=self.schema_dir), \
+                mock.patch.object(schema, 'generate_schema', wraps=schema.generate_schema) as generate:
+            response = self.client.get('/swagger.json/')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('/bookings/', response.json()['paths'])
+            etag = response['ETag']
+
+            again = self.client.get('/swagger.json/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(again.status_code, 304)
+            self.assertEqual(self.client.get('/swagger.json/').content, response.content)
+        self.assertEqual(generate.call_count, 1)
+
+    def test_generated_artifact_is_served_without_regenerating(self):
+        call_command('generate_api_schema', output_dir=self.schema_dir, stdout=io.StringIO())
+        self.assertTrue(os.path.exists(os.path.join(self.schema_dir, 'openapi.yaml')))
+        with open(os.path.join(self.schema_dir, 'openapi.json'), 'rb') as fh:
+            artifact = fh.read()
+
+        with override_settings(API_SCHEMA_DIR=self.schema_dir), \
+                mock.patch.object(schema, 'generate_schema') as generate:
+            response = self.client.get('/swagger.json/')
+        self.assertEqual(response.content, artifact)
+        generate.assert_not_called()
+
+    def test_docs_pages_do_not_generate_the_schema(self):
+        from drf_yasg.generators import OpenAPISchemaGenerator
+
+        call_command('generate_api_schema', output_dir=self.schema_dir, stdout=io.StringIO())
+        with override_settings(API_SCHEMA_DIR=self.schema_dir), \
+                mock.patch.object(OpenAPISchemaGenerator, 'get_schema') as get_schema:
+            for url in ('/swagger/', '/redoc/', '/swagger/', '/redoc/'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'/swagger.json/', response.content)
+                self.assertIn(b'ALX Travel API', response.content)
+            self.assertEqual(self.client.get('/swagger.json/').status_code, 200)
+        get_schema.assert_not_called()
+
+
+class BookingSnapshotTests(ListingTestCase):
+    property_name = 'Lakefront Cottage'
+    property_location = 'Naivasha'
+    pricepernight = Decimal('9000.00')
+
+    def setUp(self):
+        super().setUp()
+        self.booking = self.make_booking(date.today() + timedelta(days=1), nights=2)
+
+    def test_snapshot_is_filled_on_create_and_kept_after_property_changes(self):
+        self.property.name = 'Renamed Cottage'
+        self.property.pricepernight = Decimal('12000.00')
+        self.property.save()
+
+        booking = Booking.objects.get(pk=self.booking.pk)
+        self.assertEqual(booking.property_name, 'Lakefront Cottage')
+        self.assertEqual(booking.property_location, 'Naivasha')
+        self.assertEqual(booking.pricepernight, Decimal('9000.00'))
+        self.assertEqual(booking.guest_username, 'guest')
+
+    def test_snapshot_is_refilled_when_the_booking_moves(self):
+        other_guest = User.objects.create(username='other-guest')
+        other = self.make_property('Hilltop Cabin', 'Limuru', Decimal('4000.00'))
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.property = other
+        booking.user = other_guest
+        booking.save()
+
+        booking = Booking.objects.get(pk=self.booking.pk)
+        self.assertEqual(booking.property_name, 'Hilltop Cabin')
+        self.assertEqual(booking.property_location, 'Limuru')
+        self.assertEqual(booking.pricepernight, Decimal('4000.00'))
+        self.assertEqual(booking.guest_username, 'other-guest')
+        self.assertIn('Hilltop Cabin', str(booking))
+
+    def test_str_does_not_query_related_rows(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        payment = Payment.objects.create(booking=booking, amount=Decimal('18000.00'))
+        payment = Payment.objects.get(pk=payment.pk)
+        with self.assertNumQueries(0):
+            self.assertIn('Lakefront Cottage', str(booking))
+            self.assertIn(str(booking.booking_id), str(payment))
+
+    def test_history_reads_only_the_booking_table(self):
+        # Two validator aggregates (bookings, tombstones) and the list itself
+        with self.assertNumQueries(3) as queries:
+            response = self.client.get('/api/bookings/history/')
+        self.assertFalse(any(
+            'listings_property' in q['sql'] or 'auth_user' in q['sql'] for q in queries.captured_queries
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['property_name'], 'Lakefront Cottage')
+        self.assertEqual(response.json()[0]['nights'], 2)
+
+
+class PricingTests(ListingTestCase):
+    property_name = 'City Studio'
+    property_location = 'Kilimani'
+
+    def setUp(self):
+        rule_cache.clear()
+        super().setUp()
+        # A Monday well in the future
+        self.monday = date.today() + timedelta(days=7 - date.today().weekday() + 28)
+
+    def rule(self, rule_type, **kwargs):
+        return PricingRule.objects.create(property=self.property, rule_type=rule_type, **kwargs)
+
+    def test_base_price_without_rules(self):
+        result = quote(self.property.pk, self.monday, self.monday + timedelta(days=3))
+        self.assertEqual(result.nights, 3)
+        self.assertEqual(result.total, Decimal('300.00'))
+
+    def test_weekend_rate_applies_to_friday_and_saturday_nights(self):
+        self.rule('weekend', percent=Decimal('50'))
+        # Monday to Monday: five weekday nights and two weekend nights
+        result = quote(self.property.pk, self.monday, self.monday + timedelta(days=7))
+        self.assertEqual(result.total, Decimal('800.00'))
+
+    def test_latest_starting_season_wins_where_seasons_overlap(self):
+        self.rule('seasonal', percent=Decimal('100'),
+                  start_date=self.monday, end_date=self.monday + timedelta(days=3))
+        self.rule('seasonal', nightly_price=Decimal('150.00'),
+                  start_date=self.monday + timedelta(days=1), end_date=self.monday + timedelta(days=1))
+        # 200 + 150 + 200 + 200 (last season night) + 100
+        result = quote(self.property.pk, self.monday, self.monday + timedelta(days=5))
+        self.assertEqual(result.total, Decimal('850.00'))
+
+    def test_longest_matching_stay_discount_applies(self):
+        self.rule('length_of_stay', percent=Decimal('-10'), min_nights=3)
+        self.rule('length_of_stay', percent=Decimal('-20'), min_nights=4)
+        self.assertEqual(quote(self.property.pk, self.monday, self.monday + timedelta(days=2)).total,
+                         Decimal('200.00'))
+        self.assertEqual(quote(self.property.pk, self.monday, self.monday + timedelta(days=3)).total,
+                         Decimal('270.00'))
+        self.assertEqual(quote(self.property.pk, self.monday, self.monday + timedelta(days=4)).total,
+                         Decimal('320.00'))
+
+    def test_rules_are_cached_and_invalidated_on_change(self):
+        quote(self.property.pk, self.monday, self.monday + timedelta(days=1))
+        with self.assertNumQueries(0):
+            quote(self.property.pk, self.monday, self.monday + timedelta(days=2))
+
+        rule = self.rule('length_of_stay', percent=Decimal('-50'), min_nights=1)
+        self.assertEqual(quote(self.property.pk, self.monday, self.monday + timedelta(days=1)).total,
+                         Decimal('50.00'))
+        rule.delete()
+        self.property.pricepernight = Decimal('120.00')
+        self.property.save()
+        self.assertEqual(quote(self.property.pk, self.monday, self.monday + timedelta(days=1)).total,
+                         Decimal('120.00'))
+
+    def test_booking_total_is_computed_server_side(self):
+        self.rule('weekend', percent=Decimal('50'))
+        response = self.client.post('/api/bookings/', {
+            'property_id': str(self.property.pk),
+            'user_id': self.guest.id,
+            'start_date': self.monday.isoformat(),
+            'end_date': (self.monday + timedelta(days=7)).isoformat(),
+            'total_price': '1.00',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_price'], '800.00')
+
+    def test_booking_overlapping_an_existing_one_is_rejected(self):
+        self.make_booking(self.monday, nights=3)
+        response = self.client.post('/api/bookings/', {
+            'property_id': str(self.property.pk),
+            'user_id': self.guest.id,
+            'start_date': (self.monday + timedelta(days=2)).isoformat(),
+            'end_date': (self.monday + timedelta(days=4)).isoformat(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_canceled_booking_cannot_be_reactivated(self):
+        canceled = self.make_booking(self.monday, nights=3, status='canceled')
+        self.make_booking(self.monday, nights=3)
+        for new_status in ('confirmed', 'pending'):
+            response = self.client.patch(
+                f'/api/bookings/{canceled.pk}/', {'status': new_status}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.get(pk=canceled.pk).status, 'canceled')
+
+    def test_malformed_property_id_is_a_404(self):
+        self.assertEqual(self.client.get('/api/properties/bad/pricing-rules/').status_code, 404)
+        response = self.client.post('/api/properties/bad/pricing-rules/', {
+            'rule_type': 'weekend', 'percent': '10',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class QuoteTests(ListingTestCase):
+    property_name = 'Property 0'
+
+    def setUp(self):
+        rule_cache.clear()
+        super().setUp()
+        self.properties = [self.property] + [
+            self.make_property(f'Property {i}', pricepernight=Decimal('100.00') * (i + 1))
+            for i in range(1, 5)
+        ]
+        self.start = date.today() + timedelta(days=10)
+        self.make_booking(self.start, nights=2)
+
+    def post_quotes(self, items):
+        return self.client.post('/api/quotes/', {'items': items}, content_type='application/json')
+
+    def item(self, property_obj, offset, nights):
+        start = self.start + timedelta(days=offset)
+        return {
+            'property_id': str(property_obj.pk),
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=nights)).isoformat(),
+        }
+
+    def test_quotes_price_nights_and_availability(self):
+        response = self.post_quotes([
+            self.item(self.properties[0], 1, 2),
+            self.item(self.properties[0], 2, 2),
+            self.item(self.properties[1], 0, 3),
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['available'] for r in results], [False, True, True])
+        self.assertEqual(results[2]['nights'], 3)
+        self.assertEqual(results[2]['total_price'], '600.00')
+
+    def test_query_count_does_not_grow_with_items(self):
+        items = [self.item(p, n, 1 + n) for n in range(10) for p in self.properties]
+        # properties, pricing rules and blocking bookings
+        with self.assertNumQueries(3):
+            response = self.post_quotes(items)
+        self.assertEqual(len(response.json()['results']), 50)
+
+    def test_unknown_property_is_reported_per_item(self):
+        response = self.post_quotes([{
+            'property_id': '00000000-0000-0000-0000-000000000000',
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=1)).isoformat(),
+        }])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['error'], 'Property does not exist')
+
+    def test_invalid_dates_are_rejected(self):
+        response = self.post_quotes([self.item(self.properties[0], 0, 0)])
+        self.assertEqual(response.status_code, 400)
+
+
+class MessagePackTests(ListingTestCase):
+    property_name = 'Beach House'
+    property_location = 'Diani'
+    pricepernight = Decimal('250.00')
+
+    def test_msgpack_carries_the_same_data_as_json(self):
+        as_json = self.client.get('/api/properties/').json()
+        response = self.client.get('/api/properties/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), as_json)
+
+    def test_json_stays_the_default(self):
+        response = self.client.get('/api/properties/', HTTP_ACCEPT='*/*')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_msgpack_request_bodies_are_parsed(self):
+        start = date.today() + timedelta(days=5)
+        body = msgpack.packb({
+            'property_id': str(self.property.pk),
+            'user_id': self.guest.pk,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=2)).isoformat(),
+        })
+        response = self.client.post(
+            '/api/bookings/', body, content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)['total_price'], '500.00')
+
+        garbage = self.client.post('/api/bookings/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(garbage.status_code, 400)
+
+
+class ReviewTests(ListingTestCase):
+    property_name = 'Tea Estate Bungalow'
+    property_location = 'Kericho'
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.url = f'/api/properties/{self.property.pk}/reviews/'
+        self.past = date.today() - timedelta(days=10)
+
+    def reviewer(self, name, stayed=True, status='confirmed'):
+        user = User.objects.create(username=name)
+        if stayed:
+            self.make_booking(self.past, nights=2, status=status, user=user)
+        return user
+
+    def post(self, data):
+        return self.client.post(self.url, data, content_type='application/json')
+
+    def review(self, user, rating=5):
+        return {'user_id': user.pk, 'rating': rating, 'comment': 'Lovely stay'}
+
+    def test_only_guests_with_a_completed_stay_review_once(self):
+        guest = self.reviewer('visitor')
+        response = self.post(self.review(guest))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['username'], 'visitor')
+
+        self.assertEqual(self.post(self.review(guest)).status_code, 400)
+        self.assertEqual(self.post(self.review(self.reviewer('stranger', stayed=False))).status_code, 400)
+        self.assertEqual(self.post(self.review(self.reviewer('canceled', status='canceled'))).status_code, 400)
+
+    def test_archived_stays_count(self):
+        guest = self.reviewer('archived')
+        archive_bookings(date.today())
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(self.post(self.review(guest)).status_code, 201)
+
+    def test_batch_is_checked_in_a_constant_number_of_queries(self):
+        def post_batch(prefix, count):
+            guests = [self.reviewer(f'{prefix}{i}') for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post([self.review(g) for g in guests])
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.json()), count)
+            return len(queries)
+
+        self.assertEqual(post_batch('small', 2), post_batch('large', 6))
+        self.assertEqual(Review.objects.count(), 8)
+
+    def test_batch_errors_are_reported_per_item(self):
+        guest = self.reviewer('visitor')
+        response = self.post([self.review(guest), self.review(self.reviewer('stranger', stayed=False))])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('completed stay', errors[1]['non_field_errors'][0])
+        self.assertFalse(Review.objects.exists())
+
+    def test_first_page_is_cached_until_a_review_is_written(self):
+        self.post(self.review(self.reviewer('first')))
+        self.assertEqual(len(self.client.get(self.url).json()['results']), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(self.url).json()['results']), 1)
+
+        self.post(self.review(self.reviewer('second')))
+        results = self.client.get(self.url).json()['results']
+        self.assertEqual([r['username'] for r in results], ['second', 'first'])
+
+    def test_feed_is_cursor_paginated(self):
+        guests = [self.reviewer(f'guest{i}') for i in range(25)]
+        self.post([self.review(g) for g in guests])
+        page = self.client.get(self.url).json()
+        self.assertEqual(len(page['results']), 20)
+        rest = self.client.get(page['next']).json()
+        self.assertEqual(len(rest['results']), 5)
+        self.assertIsNone(rest['next'])
+
+    def test_cached_first_page_links_follow_each_request(self):
+        guests = [self.reviewer(f'guest{i}') for i in range(25)]
+        self.post([self.review(g) for g in guests])
+        with override_settings(ALLOWED_HOSTS=['other']):
+            response = self.client.get(self.url, {'format': 'msgpack'}, HTTP_HOST='other')
+        self.assertEqual(response.status_code, 200)
+
+        page = self.client.get(self.url).json()
+        self.assertTrue(page['next'].startswith('http://testserver/'))
+        self.assertNotIn('format=msgpack', page['next'])
+        self.assertIsNone(page['previous'])
+        self.assertEqual(len(self.client.get(page['next']).json()['results']), 5)
+
+
+class BookingSyncTests(ListingTestCase):
+    property_name = 'Safari Lodge'
+    property_location = 'Maasai Mara'
+    pricepernight = Decimal('300.00')
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create(username='other')
+        self.start = date.today() + timedelta(days=20)
+        self.bookings = [self.booking(self.guest, i) for i in range(3)]
+        self.old = timezone.now() - timedelta(days=2)
+        Booking.objects.update(updated_at=self.old)
+        self.url = f'/api/bookings/?user_id={self.guest.pk}'
+
+    def booking(self, user, offset):
+        return self.make_booking(self.start + timedelta(days=2 * offset), user=user)
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()), 3)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with self.assertNumQueries(2):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+        since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+
+        # Another guest's booking leaves this guest's list alone
+        self.booking(self.other, 5)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.bookings[0].status = 'confirmed'
+        self.bookings[0].save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deletes_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.bookings[0].delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_detail_is_conditional(self):
+        url = f'/api/bookings/{self.bookings[0].pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_since_returns_only_changes_and_deletions(self):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        self.bookings[1].status = 'canceled'
+        self.bookings[1].save()
+        deleted_id = str(self.bookings[2].pk)
+        self.bookings[2].delete()
+
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([b['booking_id'] for b in data['changed']], [str(self.bookings[1].pk)])
+        self.assertEqual(data['deleted'], [deleted_id])
+        self.assertTrue(data['next_since'])
+
+    def test_since_rejects_bad_and_expired_timestamps(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+        expired = timezone.now() - timedelta(days=settings.BOOKING_TOMBSTONE_RETENTION_DAYS + 1)
+        self.assertEqual(self.client.get(self.url, {'since': expired.isoformat()}).status_code, 410)
+
+    def test_malformed_property_id_is_a_404(self):
+        for url in ('/api/properties/bad/bookings/', '/api/properties/bad/bookings/history/'):
+            self.assertEqual(self.client.get(url).status_code, 404)
+            self.assertEqual(self.client.get(url, {'since': self.old.isoformat()}).status_code, 404)
+        nested = f'/api/properties/{self.property.pk}/bookings/'
+        self.assertEqual(len(self.client.get(nested).json()), 3)
+        self.assertEqual(len(self.client.get(nested + 'history/').json()), 3)
+
+    def test_archived_bookings_are_reported_deleted(self):
+        since = timezone.now().isoformat()
+        past = date.today() - timedelta(days=5)
+        Booking.objects.filter(pk=self.bookings[0].pk).update(
+            start_date=past, end_date=past + timedelta(days=1), status='confirmed',
+        )
+        archive_bookings(date.today())
+        self.assertEqual(self.client.get(self.url, {'since': since}).json()['deleted'],
+                         [str(self.bookings[0].pk)])
+
+    def test_bookings_cannot_leave_their_scope(self):
+        other_property = self.make_property('Beach House', 'Diani')
+        url = f'/api/bookings/{self.bookings[0].pk}/'
+        for change in ({'property_id': str(other_property.pk)}, {'user_id': self.other.pk}):
+            response = self.client.patch(url, change, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        booking = Booking.objects.get(pk=self.bookings[0].pk)
+        self.assertEqual((booking.property_id, booking.user_id), (self.property.pk, self.guest.pk))
+
+        request = mock.Mock()
+        readonly = BookingAdmin(Booking, admin.site).get_readonly_fields(request, booking)
+        self.assertIn('property', readonly)
+        self.assertIn('user', readonly)
+
+    def test_old_tombstones_are_pruned(self):
+        self.bookings[0].delete()
+        later = timezone.now() + timedelta(days=settings.BOOKING_TOMBSTONE_RETENTION_DAYS + 1)
+        self.assertEqual(prune_tombstones(now=later), 1)
+
+
+class ArchiveTests(ListingTestCase):
+    property_name = 'Tea Estate Bungalow'
+    property_location = 'Kericho'
+
+    def setUp(self):
+        super().setUp()
+        self.cutoff = date.today() - timedelta(days=365)
+
+    def booking(self, days_ago, status):
+        return self.make_booking(date.today() - timedelta(days=days_ago), nights=2, status=status)
+
+    def test_old_finished_bookings_move_with_their_payments(self):
+        old = [self.booking(800 + i * 5, 'confirmed') for i in range(3)]
+        old_canceled = self.booking(700, 'canceled')
+        old_pending = self.booking(700 + 10, 'pending')
+        recent = self.booking(30, 'confirmed')
+        Payment.objects.create(booking=old[0], amount=Decimal('200.00'), transaction_id='tx-1')
+
+        bookings, payments = archive_bookings(self.cutoff, batch_size=2)
+
+        self.assertEqual((bookings, payments), (4, 1))
+        self.assertEqual(
+            set(Booking.objects.values_list('pk', flat=True)), {old_pending.pk, recent.pk}
+        )
+        self.assertFalse(Payment.objects.exists())
+        archived = ArchivedBooking.objects.get(pk=old[0].pk)
+        self.assertEqual(archived.property_name, 'Tea Estate Bungalow')
+        self.assertTrue(ArchivedBooking.objects.filter(pk=old_canceled.pk).exists())
+        self.assertEqual(ArchivedPayment.objects.get().transaction_id, 'tx-1')
+
+    def test_max_batches_stops_early_and_the_next_run_resumes(self):
+        for i in range(5):
+            self.booking(800 + i * 5, 'confirmed')
+
+        self.assertEqual(archive_bookings(self.cutoff, batch_size=2, max_batches=1), (2, 0))
+        self.assertEqual(Booking.objects.count(), 3)
+        self.assertEqual(archive_bookings(self.cutoff, batch_size=2), (3, 0))
+        self.assertEqual(ArchivedBooking.objects.count(), 5)
+
+    def test_archived_bookings_are_readable_through_the_api(self):
+        booking = self.booking(800, 'confirmed')
+        Payment.objects.create(booking=booking, amount=Decimal('200.00'), transaction_id='tx-2')
+        archive_bookings(self.cutoff)
+
+        response = self.client.get(f'/api/properties/{self.property.pk}/archived-bookings/')
+        self.assertEqual([b['booking_id'] for b in response.json()], [str(booking.pk)])
+        response = self.client.get(f'/api/archived-bookings/{booking.pk}/')
+        self.assertEqual(response.json()['nights'], 2)
+        self.assertEqual(response.json()['payments'][0]['transaction_id'], 'tx-2')
+        self.assertEqual(self.client.get('/api/properties/bad/archived-bookings/').status_code, 404)
+
+
+class BookingHoldTests(ListingTestCase):
+    property_name = 'Rift Valley Lodge'
+    property_location = 'Naivasha'
+
+    def setUp(self):
+        super().setUp()
+        self.start = date.today() + timedelta(days=10)
+
+    def booking(self, status='pending', expired=False):
+        booking = self.make_booking(self.start, nights=2, status=status)
+        if expired:
+            Booking.objects.filter(pk=booking.pk).update(
+                hold_expires_at=timezone.now() - timedelta(minutes=1)
+            )
+            booking.refresh_from_db()
+        return booking
+
+    def book(self):
+        return self.client.post('/api/bookings/', {
+            'property_id': str(self.property.pk), 'user_id': self.guest.pk,
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=1)).isoformat(),
+        }, content_type='application/json')
+
+    @override_settings(BOOKING_HOLD_MINUTES=15)
+    def test_new_pending_bookings_get_a_hold(self):
+        before = timezone.now()
+        pending = self.booking()
+        self.assertGreaterEqual(pending.hold_expires_at, before + timedelta(minutes=15))
+        self.assertIsNone(self.booking(status='confirmed').hold_expires_at)
+
+    def confirm(self, booking):
+        return self.client.patch(
+            f'/api/bookings/{booking.pk}/', {'status': 'confirmed'}, content_type='application/json'
+        )
+
+    def test_expired_holds_do_not_block_the_dates(self):
+        held = self.booking()
+        self.assertEqual(self.book().status_code, 400)
+
+        Booking.objects.filter(pk=held.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(self.confirm(held).status_code, 400)
+
+        # Once canceled by the expiry task it stays canceled
+        expire_holds()
+        self.assertEqual(self.confirm(held).status_code, 400)
+        self.assertEqual(Booking.objects.blocking().overlapping(self.start, self.start + timedelta(days=2)).count(), 1)
+
+    def test_expired_hold_can_be_confirmed_while_its_dates_are_free(self):
+        self.assertEqual(self.confirm(self.booking(expired=True)).status_code, 200)
+
+    def test_payment_needs_a_booking_that_still_holds_its_dates(self):
+        for booking in (self.booking(expired=True), self.booking(status='canceled')):
+            with mock.patch('requests.post') as post:
+                response = self.client.post(f'/api/payments/{booking.pk}/initiate/')
+            self.assertEqual(response.status_code, 409)
+            post.assert_not_called()
+
+    def test_expiry_cancels_in_batches_and_leaves_live_bookings(self):
+        expired = [self.booking(expired=True) for _ in range(5)]
+        live = self.booking()
+        confirmed = self.booking(status='confirmed')
+        before = expired[0].updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(expire_holds(batch_size=2, max_batches=2), 4)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in queries), 2)
+        self.assertEqual(expire_holds(batch_size=2), 1)
+
+        self.assertEqual(Booking.objects.filter(status='canceled').count(), 5)
+        self.assertGreater(Booking.objects.get(pk=expired[0].pk).updated_at, before)
+        self.assertEqual(Booking.objects.get(pk=live.pk).status, 'pending')
+        self.assertEqual(Booking.objects.get(pk=confirmed.pk).status, 'confirmed')
+
+
+class HostStatsTests(ListingTestCase):
+    property_name = 'Host Property 0'
+
+    def setUp(self):
+        super().setUp()
+        self.properties = [self.property, self.make_property('Host Property 1')]
+
+    def booking(self, property_obj, start, nights, status='confirmed'):
+        return self.make_booking(start, nights, status=status, property_obj=property_obj)
+
+    def stats(self, first, last):
+        response = self.client.get(f'/api/host-stats/{self.host.pk}/?from={first}&to={last}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_stays_are_split_across_months(self):
+        self.booking(self.properties[0], date(2030, 1, 30), 4)
+        self.booking(self.properties[1], date(2030, 2, 10), 2)
+        self.booking(self.properties[1], date(2030, 2, 20), 2, status='canceled')
+        Review.objects.create(property=self.properties[0], user=self.guest, rating=4, comment='Good')
+        refresh_property_stats()
+
+        stats = self.stats('2030-01', '2030-02')
+        self.assertEqual(stats['properties'], 2)
+        self.assertEqual(stats['nights_booked'], 6)
+        self.assertEqual(stats['revenue'], '600.00')
+        self.assertEqual(stats['average_rating'], 4)
+        january, february = stats['months']
+        self.assertEqual((january['nights_booked'], january['revenue']), (2, '200.00'))
+        self.assertEqual((february['nights_booked'], february['revenue']), (4, '400.00'))
+        self.assertEqual(february['occupancy_rate'], round(4 / 56, 4))
+
+    def test_incremental_refresh_picks_up_changes_moves_and_deletes(self):
+        moved = self.booking(self.properties[0], date(2030, 3, 1), 3)
+        removed = self.booking(self.properties[0], date(2030, 3, 10), 2)
+        refresh_property_stats()
+        self.assertEqual(self.stats('2030-03', '2030-03')['nights_booked'], 5)
+
+        pending = self.booking(self.properties[1], date(2030, 3, 20), 5, status='pending')
+        pending.status = 'confirmed'
+        pending.save()
+        moved = Booking.objects.get(pk=moved.pk)
+        moved.start_date, moved.end_date = date(2030, 4, 1), date(2030, 4, 4)
+        moved.save()
+        Booking.objects.get(pk=removed.pk).delete()
+        refreshed = refresh_property_stats()
+
+        # March for both properties and the moved booking's April
+        self.assertEqual(refreshed, 3)
+        stats = self.stats('2030-03', '2030-04')
+        self.assertEqual([m['nights_booked'] for m in stats['months']], [5, 3])
+
+    def test_refresh_repeats_the_overlap_window(self):
+        booking = self.booking(self.properties[0], date(2030, 3, 1), 3, status='pending')
+        refresh_property_stats()
+        # Stamped just before the run started but committed after it read the bookings
+        started_at = StatsRefresh.objects.first().started_at
+        Booking.objects.filter(pk=booking.pk).update(
+            status='confirmed', updated_at=started_at - timedelta(seconds=1)
+        )
+        refresh_property_stats()
+        self.assertEqual(self.stats('2030-03', '2030-03')['nights_booked'], 3)
+
+    def test_invalid_month_is_rejected(self):
+        response = self.client.get(f'/api/host-stats/{self.host.pk}/?from=2030-13')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_or_malformed_host_is_a_404(self):
+        self.assertEqual(self.client.get('/api/host-stats/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/host-stats/abc/').status_code, 404)
+
+
+class AdminTests(ListingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.start = date.today() + timedelta(days=10)
+
+    def add_bookings(self, count, status='pending'):
+        bookings = []
+        for i in range(count):
+            property_obj = self.make_property(f'Admin Property {Property.objects.count()}')
+            booking = self.make_booking(self.start, status=status, property_obj=property_obj)
+            Payment.objects.create(booking=booking, amount=Decimal('100.00'))
+            Review.objects.create(property=property_obj, user=self.guest, rating=4, comment='Nice')
+            bookings.append(booking)
+        return bookings
+
+    def assert_query_count_independent_of_rows(self, url):
+        self.add_bookings(2)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_bookings(10)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(small), len(large))
+
+    def test_changelists_do_not_query_per_row(self):
+        for model in ('property', 'booking', 'review', 'payment'):
+            with self.subTest(model=model):
+                self.assert_query_count_independent_of_rows(f'/admin/listings/{model}/')
+                self.assertEqual(self.client.get(f'/admin/listings/{model}/add/').status_code, 200)
+
+    def test_bulk_confirm_is_a_single_update(self):
+        pending = self.add_bookings(2)
+        canceled = self.add_bookings(1, status='canceled')
+        before = Booking.objects.get(pk=pending[0].pk).updated_at
+        ids = [str(b.pk) for b in pending + canceled]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin/listings/booking/', {
+                'action': 'confirm_bookings', '_selected_action': ids,
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in queries), 1)
+        self.assertEqual(Booking.objects.filter(status='confirmed').count(), 2)
+        self.assertEqual(Booking.objects.get(pk=canceled[0].pk).status, 'canceled')
+        self.assertGreater(Booking.objects.get(pk=pending[0].pk).updated_at, before)
+
+    def test_bulk_confirm_skips_expired_holds(self):
+        live, expired = self.add_bookings(2)
+        Booking.objects.filter(pk=expired.pk).update(hold_expires_at=timezone.now())
+        self.client.post('/admin/listings/booking/', {
+            'action': 'confirm_bookings', '_selected_action': [str(live.pk), str(expired.pk)],
+        })
+        self.assertEqual(Booking.objects.get(pk=live.pk).status, 'confirmed')
+        self.assertEqual(Booking.objects.get(pk=expired.pk).status, 'pending')
+
+
+class ThrottlingTests(ListingTestCase):
+    property_name = 'Coastal Villa'
+    property_location = 'Malindi'
+
+    def setUp(self):
+        reset_bucket_store()
+        super().setUp()
+        self.start = date.today() + timedelta(days=5)
+
+    def tearDown(self):
+        reset_bucket_store()
+
+    def post_booking(self, offset):
+        start = self.start + timedelta(days=2 * offset)
+        return self.client.post('/api/bookings/', {
+            'property_id': str(self.property.pk),
+            'user_id': self.guest.id,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=1)).isoformat(),
+        }, content_type='application/json')
+
+    def test_bucket_allows_a_burst_then_refills(self):
+        store = MemoryBucketStore()
+        results = [store.take('k', 2, 1.0, now=100.0)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(store.take('k', 2, 1.0, now=100.5), (False, 0.5))
+        self.assertTrue(store.take('k', 2, 1.0, now=101.0)[0])
+
+    def test_booking_writes_are_throttled_with_retry_after(self):
+        with throttle_rates(booking_user='2/min'):
+            self.assertEqual(self.post_booking(0).status_code, 201)
+            self.assertEqual(self.post_booking(1).status_code, 201)
+            response = self.post_booking(2)
+            self.assertEqual(response.status_code, 429)
+            self.assertGreater(int(response['Retry-After']), 0)
+            # Reads are never throttled
+            self.assertEqual(self.client.get('/api/bookings/').status_code, 200)
+
+    def test_property_bucket_is_shared_by_all_users(self):
+        with throttle_rates(booking_property='1/min'):
+            self.assertEqual(self.post_booking(0).status_code, 201)
+            self.client.defaults['REMOTE_ADDR'] = '10.0.0.2'
+            self.assertEqual(self.post_booking(1).status_code, 429)
+
+    def test_malformed_booking_id_is_a_404(self):
+        with throttle_rates(booking_property='10/min'):
+            response = self.client.patch(
+                '/api/bookings/not-a-uuid/', {'status': 'confirmed'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_payment_is_shed_when_gateway_slots_are_taken(self):
+        booking = self.make_booking(self.start)
+        limiter = ConcurrencyLimiter(1)
+        with mock.patch('listings.views.gateway_limiter', limiter), limiter.slot() as held:
+            self.assertTrue(held)
+            response = self.client.post(f'/api/payments/{booking.pk}/initiate/')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+@throttle_rates()
+class GatewayStubTests(ListingTestCase):
+    property_name = 'Lamu Dhow House'
+    property_location = 'Lamu'
+
+    def setUp(self):
+        super().setUp()
+        self.booking = self.make_booking(date.today() + timedelta(days=3))
+
+    def stub(self, **options):
+        server = start_stub_server(latency_ms=0, seed=1, **options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def initiate(self, server, timeout=5):
+        with override_settings(CHAPA_API_URL=server.url, PAYMENT_GATEWAY_TIMEOUT=timeout):
+            return self.client.post(f'/api/payments/{self.booking.pk}/initiate/')
+
+    def test_payment_goes_through_the_configured_gateway(self):
+        server = self.stub()
+        response = self.initiate(server)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['payment']['transaction_id'], str(self.booking.pk))
+        self.assertEqual(server.counts['ok'], 1)
+
+    def test_stub_errors_and_timeouts(self):
+        self.assertEqual(self.initiate(self.stub(error_rate=1.0)).status_code, 400)
+        server = self.stub(timeout_rate=1.0, hang_seconds=1)
+        self.assertEqual(self.initiate(server, timeout=0.1).status_code, 504)
+
+
+@throttle_rates()
+class LoadDriverTests(LiveServerTestCase):
+    def test_flows_book_and_pay_end_to_end(self):
+        host = User.objects.create(username='host')
+        User.objects.create(username='other-host')
+        Property.objects.create(
+            host=host, name='Load Property', description='Sample',
+            location='Nairobi', pricepernight=Decimal('100.00'),
+        )
+        server = start_stub_server(latency_ms=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with override_settings(CHAPA_API_URL=server.url), requests.Session() as session:
+            targets, first_free = discover_targets(session, self.live_server_url, 5)
+            report = run_load(self.live_server_url, plan_flows(targets, first_free, 4), concurrency=2)
+
+        self.assertEqual(report['flow']['outcomes'], {'ok': 4})
+        self.assertEqual(report['booking']['outcomes'], {'201': 4})
+        self.assertGreater(report['throughput_flows_per_s'], 0)
+        self.assertEqual(Payment.objects.count(), 4)
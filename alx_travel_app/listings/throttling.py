@@ -0,0 +1,188 @@
+# listings/throttling.py
+"""
+Token-bucket throttles for booking and payment writes, and a concurrency
+limiter for calls to the payment gateway.
+
+Buckets live in process memory by default. Set THROTTLE_BUCKET_CACHE to a
+CACHES alias (e.g. a Redis or Memcached cache) to share them between
+processes; cache updates are not atomic, so concurrent requests for the
+same key can overshoot a limit by a request or two.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .models import Booking
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill of 10 tokens per 60 seconds)"""
+    if not rate:
+        return None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """Buckets in a bounded, thread-safe dict; evicted buckets start full again"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_per_second, now):
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            allowed, tokens, wait = _take(tokens, stamp, capacity, refill_per_second, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return allowed, wait
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache, shared by every process using it"""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, refill_per_second, now):
+        tokens, stamp = self.cache.get(key, (capacity, now))
+        allowed, tokens, wait = _take(tokens, stamp, capacity, refill_per_second, now)
+        # A bucket left alone until it is full again is the same as no bucket
+        self.cache.set(key, (tokens, now), int(capacity / refill_per_second) + 1)
+        return allowed, wait
+
+
+def _take(tokens, stamp, capacity, refill_per_second, now):
+    tokens = min(capacity, tokens + (now - stamp) * refill_per_second)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / refill_per_second
+
+
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        alias = getattr(settings, 'THROTTLE_BUCKET_CACHE', None)
+        _store = CacheBucketStore(alias) if alias else MemoryBucketStore()
+    return _store
+
+
+def reset_bucket_store():
+    global _store
+    _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Allows bursts of up to N requests and then N per period, using the
+    scope's rate in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']. A missing or
+    empty rate disables the throttle.
+    """
+    scope = None
+    # Reads are not throttled unless a subclass says so
+    throttle_safe_methods = False
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if request.method in SAFE_METHODS and not self.throttle_safe_methods:
+            return True
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+
+        capacity, period = rate
+        allowed, wait = get_bucket_store().take(
+            f'throttle:{self.scope}:{key}', capacity, capacity / period, time.time()
+        )
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserThrottleMixin:
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class BookingUserThrottle(UserThrottleMixin, TokenBucketThrottle):
+    scope = 'booking_user'
+
+
+class BookingPropertyThrottle(TokenBucketThrottle):
+    scope = 'booking_property'
+
+    def get_key(self, request, view):
+        property_id = view.kwargs.get('property_pk')
+        if not property_id and hasattr(request.data, 'get'):
+            property_id = request.data.get('property_id')
+        if not property_id and view.kwargs.get('pk'):
+            # Updates of an existing booking count against its property. A
+            # malformed pk gets no key here and a 404 from the view
+            try:
+                booking_id = uuid.UUID(str(view.kwargs['pk']))
+            except ValueError:
+                return None
+            property_id = Booking.objects.filter(pk=booking_id).values_list(
+                'property_id', flat=True
+            ).first()
+        return str(property_id) if property_id else None
+
+
+class PaymentUserThrottle(UserThrottleMixin, TokenBucketThrottle):
+    scope = 'payment_user'
+    # initiate_payment also starts a payment on GET
+    throttle_safe_methods = True
+
+
+class ConcurrencyLimiter:
+    """
+    Caps concurrent calls to an external service within this process.
+    Callers that cannot get a slot in time are expected to shed the request.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    @contextmanager
+    def slot(self, timeout=0):
+        if timeout:
+            acquired = self._semaphore.acquire(timeout=timeout)
+        else:
+            acquired = self._semaphore.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._semaphore.release()
+
+
+gateway_limiter = ConcurrencyLimiter(getattr(settings, 'PAYMENT_GATEWAY_MAX_CONCURRENCY', 10))
@@ -1,16 +1,25 @@
 from django.urls import include, path
-from .views import PropertyViewSet, BookingViewSet, PaymentViewSet
+from .views import (
+    PropertyViewSet, BookingViewSet, PaymentViewSet, PricingRuleViewSet, QuoteViewSet,
+    ArchivedBookingViewSet, HostStatsViewSet, ReviewViewSet
+)
 from rest_framework_nested import routers
 
 # main/global routes
 router = routers.DefaultRouter()
 router.register(r'properties', PropertyViewSet, basename='properties')
 router.register(r'bookings', BookingViewSet, basename='bookings')
+router.register(r'archived-bookings', ArchivedBookingViewSet, basename='archived-bookings')
 router.register(r'payments', PaymentViewSet, basename='payments')
+router.register(r'quotes', QuoteViewSet, basename='quotes')
+router.register(r'host-stats', HostStatsViewSet, basename='host-stats')
 
 # nested routes: bookings under properties
 properties_router = routers.NestedDefaultRouter(router, r'properties', lookup='property')
 properties_router.register(r'bookings', BookingViewSet, basename='property-bookings')
+properties_router.register(r'archived-bookings', ArchivedBookingViewSet, basename='property-archived-bookings')
+properties_router.register(r'pricing-rules', PricingRuleViewSet, basename='property-pricing-rules')
+properties_router.register(r'reviews', ReviewViewSet, basename='property-reviews')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,28 +1,322 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
+from rest_framework import generics
 from rest_framework import viewsets, status
-from .models import Property, Booking, Payment
-from .serializers import PropertySerializer, BookingSerializer, PaymentSerializer
+from .models import (
+    Property, Booking, BookingTombstone, Payment, PricingRule, ArchivedBooking, ArchivedPayment,
+    Review
+)
+from .serializers import (
+    PropertySerializer, BookingSerializer, BookingHistorySerializer, PaymentSerializer,
+    PricingRuleSerializer, QuoteRequestSerializer, ArchivedBookingSerializer,
+    ArchivedPaymentSerializer, ReviewSerializer
+)
+from . import pricing, sync
+from .reviews import ALREADY_REVIEWED, get_first_page, set_first_page
+from .stats import host_stats, month_start
+from .throttling import (
+    BookingUserThrottle, BookingPropertyThrottle, PaymentUserThrottle, gateway_limiter
+)
+import uuid
+from collections import defaultdict
+from urllib.parse import parse_qs, urlparse
+from datetime import date, datetime
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+from django.contrib.auth.models import User
 from rest_framework.response import Response
 from rest_framework.decorators import action
-import requests
 from django.conf import settings
 
 # Create your views here.
+class PropertyScopedMixin:
+    """For viewsets nested under /properties/{id}/"""
+
+    def get_property_id(self):
+        """The property_pk from the URL, or a 404 if it is not a UUID"""
+        try:
+            return uuid.UUID(str(self.kwargs['property_pk']))
+        except ValueError:
+            raise Http404
+
+
 class PropertyViewSet(viewsets.ModelViewSet):
     queryset = Property.objects.all().order_by('-created_at')
     serializer_class = PropertySerializer
     
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(PropertyScopedMixin, viewsets.ModelViewSet):
+    """
+    Lists and details carry ETag and Last-Modified headers and answer
+    conditional requests with 304. ?user_id= narrows a list to one guest and
+    ?since=<ISO timestamp> returns only changes, see listings.sync.
+    """
     queryset = Booking.objects.all().order_by('-created_at')
     serializer_class = BookingSerializer
+    # Only writes are throttled, see listings.throttling
+    throttle_classes = [BookingUserThrottle, BookingPropertyThrottle]
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        property_pk = self.kwargs.get('property_pk') # from NestedDefaultRouter
-        if property_pk:
-            queryset = queryset.filter(property__property_id=property_pk)
+        if self.kwargs.get('property_pk'): # from NestedDefaultRouter
+            queryset = queryset.filter(property_id=self.get_property_id())
+        user_id = self.request.query_params.get('user_id') if self.request else None
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
         return queryset
+
+    def get_tombstones(self):
+        """Tombstones in the same scope as get_queryset()"""
+        tombstones = BookingTombstone.objects.all()
+        if self.kwargs.get('property_pk'):
+            tombstones = tombstones.filter(property_id=self.get_property_id())
+        if self.request.query_params.get('user_id'):
+            tombstones = tombstones.filter(user_id=self.request.query_params['user_id'])
+        return tombstones
+
+    def conditional_list(self, request, serializer_class):
+        user_id = request.query_params.get('user_id')
+        if user_id and not user_id.isdigit():
+            return Response({"error": "user_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset()
+        tombstones = self.get_tombstones()
+        etag, last_modified = sync.list_validators(queryset, tombstones)
+        cached = sync.not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        since = request.query_params.get('since')
+        if since is None:
+            response = Response(serializer_class(queryset, many=True, context=self.get_serializer_context()).data)
+            return sync.set_validators(response, etag, last_modified)
+
+        try:
+            changed, deleted, next_since = sync.changes_since(queryset, tombstones, sync.parse_since(since))
+        except ValueError:
+            return Response(
+                {"error": "since must be an ISO 8601 timestamp"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        except sync.SyncExpired:
+            return Response(
+                {"error": "since is older than the deletion history kept; fetch the full list"},
+                status=status.HTTP_410_GONE,
+            )
+        response = Response({
+            'next_since': next_since,
+            'changed': serializer_class(changed, many=True, context=self.get_serializer_context()).data,
+            'deleted': deleted,
+        })
+        return sync.set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list(request, self.get_serializer_class())
+
+    def retrieve(self, request, *args, **kwargs):
+        booking = self.get_object()
+        etag, last_modified = sync.booking_validators(booking)
+        cached = sync.not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+        return sync.set_validators(Response(self.get_serializer(booking).data), etag, last_modified)
+
+    @action(detail=False, methods=['GET'], url_path='history')
+    def history(self, request, property_pk=None):
+        """
+        Lists bookings from the snapshot columns without joining Property or User
+        """
+        return self.conditional_list(request, BookingHistorySerializer)
+
+
+class ArchivedBookingViewSet(PropertyScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only access to bookings moved out by listings.archive. A single
+    archived booking is returned with its archived payments.
+    """
+    queryset = ArchivedBooking.objects.all()
+    serializer_class = ArchivedBookingSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.kwargs.get('property_pk'): # from NestedDefaultRouter
+            queryset = queryset.filter(property_id=self.get_property_id())
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        booking = self.get_object()
+        data = self.get_serializer(booking).data
+        payments = ArchivedPayment.objects.filter(booking_id=booking.booking_id)
+        data['payments'] = ArchivedPaymentSerializer(payments, many=True).data
+        return Response(data)
+
+
+class PricingRuleViewSet(PropertyScopedMixin, viewsets.ModelViewSet):
+    """
+    Pricing rules of a single property, nested under /properties/{id}/.
+    Saving or deleting a rule drops the property's cached prices.
+    """
+    serializer_class = PricingRuleSerializer
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation has no property in the URL
+            return PricingRule.objects.none()
+        return PricingRule.objects.filter(property_id=self.get_property_id())
+
+    def perform_create(self, serializer):
+        property_obj = get_object_or_404(Property, pk=self.get_property_id())
+        serializer.save(property=property_obj)
+
+
+
+class ReviewPagination(CursorPagination):
+    page_size = 20
+    ordering = '-created_at'
+
+
+class ReviewViewSet(PropertyScopedMixin, viewsets.ModelViewSet):
+    """
+    Reviews of a single property, nested under /properties/{id}/. POST takes
+    one review or a list of up to ReviewSerializer.MAX_BATCH reviews; only
+    guests with a completed stay may review, once per property. The first
+    page of the feed is served from cache until the next review write.
+    """
+    serializer_class = ReviewSerializer
+    pagination_class = ReviewPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation has no property in the URL
+            return Review.objects.none()
+        return Review.objects.filter(property_id=self.get_property_id()).select_related('user')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if 'property_pk' in self.kwargs:
+            context['property_id'] = self.get_property_id()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        cursor_param = self.paginator.cursor_query_param
+        if cursor_param in request.query_params:
+            return super().list(request, *args, **kwargs)
+        property_id = self.get_property_id()
+        page, version = get_first_page(property_id)
+        if page is None:
+            data = super().list(request, *args, **kwargs).data
+            # Links carry the requester's host and query string, so only the
+            # cursor is cached and the links are rebuilt for every request
+            next_query = parse_qs(urlparse(data['next']).query) if data['next'] else {}
+            page = {'results': data['results'], 'next_cursor': next_query.get(cursor_param, [None])[0]}
+            set_first_page(property_id, version, page)
+        next_link = None
+        if page['next_cursor']:
+            next_link = replace_query_param(request.build_absolute_uri(), cursor_param, page['next_cursor'])
+        return Response({'next': next_link, 'previous': None, 'results': page['results']})
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            serializer = self.get_serializer(
+                data=request.data, many=True, allow_empty=False,
+                max_length=ReviewSerializer.MAX_BATCH,
+            )
+        else:
+            serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                serializer.save(property_id=self.get_property_id())
+        except IntegrityError:
+            # A concurrent request stored the same review after validation
+            return Response({"error": ALREADY_REVIEWED}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class QuoteViewSet(viewsets.ViewSet):
+    """
+    Prices and availability for many (property, dates) pairs in one request.
+    Uses the same number of queries however many items are sent.
+    """
+
+    def create(self, request):
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+
+        rules = pricing.get_compiled_rules({item['property_id'] for item in items})
+
+        # One query for every blocking booking in the overall date window,
+        # then each item is checked in memory
+        booked = defaultdict(list)
+        if rules:
+            window_start = min(item['start_date'] for item in items)
+            window_end = max(item['end_date'] for item in items)
+            blocking = Booking.objects.blocking().overlapping(
+                window_start, window_end
+            ).filter(property_id__in=list(rules)).values_list('property_id', 'start_date', 'end_date')
+            for property_id, start_date, end_date in blocking:
+                booked[property_id].append((start_date, end_date))
+
+        results = []
+        for item in items:
+            property_id = item['property_id']
+            start_date, end_date = item['start_date'], item['end_date']
+            result = {
+                'property_id': property_id,
+                'start_date': start_date,
+                'end_date': end_date,
+            }
+            compiled = rules.get(property_id)
+            if compiled is None:
+                result.update(nights=None, total_price=None, available=False,
+                              error='Property does not exist')
+            else:
+                quote = compiled.quote(start_date, end_date)
+                result.update(
+                    nights=quote.nights,
+                    # Same string format as BookingSerializer's total_price
+                    total_price=str(quote.total),
+                    available=not any(
+                        booked_start < end_date and booked_end > start_date
+                        for booked_start, booked_end in booked[property_id]
+                    ),
+                )
+            results.append(result)
+
+        return Response({'results': results})
+
+
+
+class HostStatsViewSet(viewsets.ViewSet):
+    """
+    Occupancy, monthly revenue and average rating across a host's
+    properties, read from the PropertyMonthStats summary table. Figures
+    lag bookings by up to one refresh_host_stats run.
+    """
+
+    def retrieve(self, request, pk=None):
+        # DRF's version answers a 404 for a pk that is not an integer
+        host = generics.get_object_or_404(User, pk=pk)
+        try:
+            last_month = self.parse_month(request.query_params.get('to')) or month_start(date.today())
+            # Default to the 12 months ending with 'to'
+            year, month = divmod(last_month.year * 12 + last_month.month - 12, 12)
+            first_month = self.parse_month(request.query_params.get('from')) or date(year, month + 1, 1)
+        except ValueError:
+            return Response({"error": "Months must be given as YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+        if first_month > last_month:
+            return Response({"error": "'from' must not be after 'to'"}, status=status.HTTP_400_BAD_REQUEST)
+        if (last_month.year - first_month.year) * 12 + last_month.month - first_month.month >= 60:
+            return Response({"error": "At most 60 months can be requested"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(host_stats(host, first_month, last_month))
+
+    @staticmethod
+    def parse_month(value):
+        if not value:
+            return None
+        return datetime.strptime(value, '%Y-%m').date()
+
     
 class PaymentViewSet(viewsets.ModelViewSet):
     """
@@ -31,13 +325,25 @@ class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
 
-    @action(detail=True, methods=['POST', 'GET'], url_path='initiate')
+    @action(detail=True, methods=['POST', 'GET'], url_path='initiate',
+            throttle_classes=[PaymentUserThrottle])
     def initiate_payment(self, request, pk=None):
         """
-        Initiates a payment for a given booking (pk=booking_id)
+        Initiates a payment for a given booking (pk=booking_id).
+        Returns 409 for a canceled booking or an expired hold, and 503 with
+        Retry-After when too many gateway calls are in flight.
         """
+        # Imported here so only the payment path pays for loading requests
+        import requests
+
         try:
             booking = Booking.objects.get(booking_id=pk)
+            if not booking.is_blocking():
+                # Canceled, or the hold ran out and the dates may be someone else's
+                return Response(
+                    {"error": "Booking is no longer holding its dates, please book again"},
+                    status=status.HTTP_409_CONFLICT
+                )
 
             payload = {
                 "amount": str(booking.total_price),
@@ -53,11 +359,19 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 "Content-Type": "application/json"
             }
 
-            response = requests.post(
-                "https://api.chapa.co/v1/transaction/initialize",
-                json=payload,
-                headers=headers
-            )
+            with gateway_limiter.slot(timeout=settings.PAYMENT_GATEWAY_QUEUE_TIMEOUT) as acquired:
+                if not acquired:
+                    return Response(
+                        {"error": "Payment gateway is busy, please retry shortly"},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        headers={"Retry-After": str(settings.PAYMENT_GATEWAY_RETRY_AFTER)}
+                    )
+                response = requests.post(
+                    f"{settings.CHAPA_API_URL.rstrip('/')}/transaction/initialize",
+                    json=payload,
+                    headers=headers,
+                    timeout=settings.PAYMENT_GATEWAY_TIMEOUT
+                )
 
             data = response.json()
 
@@ -83,5 +397,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         except Booking.DoesNotExist:
             return Response({"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND)
+        except requests.Timeout:
+            return Response(
+                {"error": "Payment gateway timed out"},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+                headers={"Retry-After": str(settings.PAYMENT_GATEWAY_RETRY_AFTER)}
+            )
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file